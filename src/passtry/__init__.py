@@ -21,29 +21,50 @@ def get_parser():
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     parser.print_usage = parser.print_help
-    parser.add_argument('-s', '--services', action=ArgSplitAction, default=list(), help='Services (`,` separated, e.g. `ssh` or `ssh:2222`)')
-    parser.add_argument('-sf', '--services-file', type=argparse.FileType('r'), default=list(), help='Services file')
+    parser.add_argument('-s', '--services', action=ArgSplitAction, default=list(), help='Services (`,` separated, e.g. `ssh`, `ssh:2222` or `ssh:2200-2299`)')
+    parser.add_argument('-sf', '--services-file', type=argparse.FileType('rb'), default=list(), help='Services file')
     parser.add_argument('-U', '--usernames', action=ArgSplitAction, default=list(), help='Usernames (`,` separated)')
-    parser.add_argument('-Uf', '--usernames-file', type=argparse.FileType('r'), default=list(), help='Usernames file')
+    parser.add_argument('-Uf', '--usernames-file', type=argparse.FileType('rb'), default=list(), help='Usernames file')
     parser.add_argument('-S', '--secrets', action=ArgSplitAction, default=list(), help='Secrets (`,` separated)')
-    parser.add_argument('-Sf', '--secrets-file', type=argparse.FileType('r'), default=list(), help='Secrets file')
-    parser.add_argument('-Cf', '--combo-file', type=argparse.FileType('r'), default=list(), help='Combo file')
+    parser.add_argument('-Sf', '--secrets-file', type=argparse.FileType('rb'), default=list(), help='Secrets file')
+    parser.add_argument('-Wd', '--weight-delimiter', default=None, help='Delimiter of weights and secrets in the secrets file with `--order ranked` (whitespace by default)')
+    parser.add_argument('-Cf', '--combo-file', type=argparse.FileType('rb'), default=list(), help='Combo file')
     parser.add_argument('-Cd', '--combo-delimiter', default=':', help='Combo file delimiter')
-    parser.add_argument('-t', '--targets', action=ArgSplitAction, default=list(), help='Targets (`,` separated, e.g. `example.com` or `example.com:22`)')
-    parser.add_argument('-tf', '--targets-file', type=argparse.FileType('r'), default=list(), help='Targets file')
+    parser.add_argument('-En', '--encoding', default=jobs.wordlists.ENCODING, help='Files encoding (lines failing to decode are read as `latin-1`)')
+    parser.add_argument('-t', '--targets', action=ArgSplitAction, default=list(), help='Targets (`,` separated, e.g. `example.com`, `example.com:22`, `10.0.0.0/16` or `10.0.0.1-50:2200-2299`)')
+    parser.add_argument('-tf', '--targets-file', type=argparse.FileType('rb'), default=list(), help='Targets file')
     parser.add_argument('-o', '--options', action=ArgSplitAction, default=dict(), help='Options (`,` separated, e.g. `http-basic:path=/secret-path/`)')
+    parser.add_argument('-Or', '--order', choices=jobs.tasks.ORDERS, default=jobs.tasks.ORDER_RANDOM, help='Order of attempts (`ranked` reads `<weight> <secret>` lines of the secrets file, highest weights first)')
     parser.add_argument('-tN', '--threads-number', type=int, default=jobs.THREADS_NUMBER, help='Number of worker threads')
+    parser.add_argument('-tP', '--threads-per-target', type=int, default=jobs.THREADS_PER_TARGET, help='Maximum number of concurrent attempts per service:port:host (`0` means no limit)')
+    parser.add_argument('-eA', '--enable-async', default=False, action='store_true', help='Run attempts as coroutines (`--threads-number` sets executor size for services without native asyncio support)')
+    parser.add_argument('-aC', '--adaptive-concurrency', default=False, action='store_true', help='Adapt number of concurrent attempts (up to `--threads-number`/`--concurrency-number`) to observed latency and failures, in total and per target')
+    parser.add_argument('-cN', '--concurrency-number', type=int, default=jobs.CONCURRENCY_NUMBER, help='Maximum number of concurrent attempts in async mode')
+    parser.add_argument('-pN', '--processes-number', type=int, default=jobs.PROCESSES_NUMBER, help='Number of processes to partition tasks across (each running its own workers)')
+    parser.add_argument('-eP', '--enable-probe', default=False, action='store_true', help='Probe every service:port:host first (connection and banner where supported), dropping unreachable ones')
     parser.add_argument('-fN', '--failed-number', type=int, default=jobs.FAILED_NUMBER, help='Maximum number of failed connections')
+    parser.add_argument('-dT', '--dns-ttl', type=int, default=services.resolver.TTL, help='Seconds to keep resolved addresses of targets for')
     parser.add_argument('-cT', '--connections-timeout', type=int, default=jobs.CONNECTIONS_TIMEOUT, help='Connections timeout')
     parser.add_argument('-tW', '--time-wait', type=float, default=jobs.TIME_WAIT, help='Time to wait between connections')
     parser.add_argument('-tR', '--time-randomize', type=int, default=jobs.TIME_RANDOMIZE, help='Randomized time in seconds to add to wait time (`--time-wait`)')
     parser.add_argument('--list-services', action='store_true', help='Show available services')
     parser.add_argument('-eF', '--enable-first-match', default=False, action='store_true', help='Abort processing on first match')
+    parser.add_argument('-sA', '--stop-on-account-match', default=False, action='store_true', help='Stop trying secrets of a username once matched (per service:port:host)')
+    parser.add_argument('-sH', '--stop-on-host-match', default=False, action='store_true', help='Stop trying a service:port:host once any credentials match')
     parser.add_argument('-dF', '--disable-failures', default=True, action='store_false', help='Disable counter for failed connections')
     parser.add_argument('-dR', '--disable-retry', default=True, action='store_false', help='Disable retry for failed connections')
+    parser.add_argument('-dD', '--disable-dedup', default=True, action='store_false', help='Disable removing duplicate usernames, secrets and credentials')
+    parser.add_argument('-dE', '--dedup-error-rate', type=float, default=jobs.dedup.ERROR_RATE, help='False positive rate of duplicates detection for inputs too large to be tracked exactly')
+    parser.add_argument('-rC', '--reuse-connections', default=False, action='store_true', help='Reuse connections for consecutive attempts where supported (not in async mode)')
     parser.add_argument('-eS', '--enable-statistics', default=False, action='store_true', help='Show statistics (attempts, successful/failed connections, matches)')
     parser.add_argument('-tS', '--time-statistics', type=int, default=jobs.TIME_STATISTICS, help='Statistics interval')
-    parser.add_argument('-Of', '--output-file', default=None, help='Save results to a file')
+    parser.add_argument('-mP', '--metrics-port', type=int, default=None, help='Serve Prometheus metrics on a local port (consecutive ports with `--processes-number`)')
+    parser.add_argument('-mF', '--metrics-file', default=None, help='Rewrite Prometheus metrics to a file every `--time-statistics` seconds')
+    parser.add_argument('-Of', '--output-file', default=None, help='Save results to a file (appended as soon as found)')
+    parser.add_argument('-OF', '--output-format', choices=jobs.sinks.FORMATS, default=jobs.sinks.FORMAT_URI, help='Output file format (URIs or JSON Lines)')
+    parser.add_argument('-Cp', '--checkpoint', default=None, help='Periodically save progress to a file')
+    parser.add_argument('-tC', '--time-checkpoint', type=int, default=jobs.TIME_CHECKPOINT, help='Checkpoint interval')
+    parser.add_argument('-Rf', '--resume', default=None, help='Resume progress from a checkpoint file (same data and options required)')
     verbosity = parser.add_mutually_exclusive_group()
     verbosity.add_argument('-d', '--debug', action='store_const', dest='loglevel', const=logs.logging.DEBUG, default=logs.logging.INFO, help='Enable debug mode (verbose output)')
     verbosity.add_argument('-q', '--quiet', action='store_const', dest='loglevel', const=logs.logging.NOTSET, default=logs.logging.INFO, help='Enable quiet mode')
@@ -54,11 +75,24 @@ def parse_args(parser, args):
     parsed = parser.parse_args(args)
     logs.init(parsed.loglevel)
     if parsed.list_services:
-        print('Services: ' + ', '.join(sorted(services.Service.registry.keys())))
+        print('Services: ' + ', '.join(services.Service.registry.names()))
         sys.exit(0)
 
     logs.logger.info('Preparing')
-    job = jobs.Job(
+    job_kwargs = dict()
+    if parsed.enable_async:
+        job_class = jobs.AsyncJob
+        job_kwargs['concurrency_number'] = parsed.concurrency_number
+    else:
+        job_class = jobs.Job
+    if parsed.processes_number > 1:
+        job_kwargs = {
+            'processes_number': parsed.processes_number,
+            'job_class': job_class,
+            'job_kwargs': job_kwargs,
+        }
+        job_class = jobs.ProcessJob
+    job = job_class(
         threads_number=parsed.threads_number,
         failed_number=parsed.failed_number,
         connections_timeout=parsed.connections_timeout,
@@ -69,36 +103,55 @@ def parse_args(parser, args):
         retry_failed=parsed.disable_retry,
         enable_statistics=parsed.enable_statistics,
         time_statistics=parsed.time_statistics,
-        output_file=parsed.output_file
+        output_file=parsed.output_file,
+        output_format=parsed.output_format,
+        reuse_connections=parsed.reuse_connections,
+        threads_per_target=parsed.threads_per_target,
+        checkpoint_file=parsed.checkpoint,
+        resume_file=parsed.resume,
+        time_checkpoint=parsed.time_checkpoint,
+        deduplicate=parsed.disable_dedup,
+        dedup_error_rate=parsed.dedup_error_rate,
+        metrics_port=parsed.metrics_port,
+        metrics_file=parsed.metrics_file,
+        adaptive_concurrency=parsed.adaptive_concurrency,
+        enable_probe=parsed.enable_probe,
+        stop_on_account_match=parsed.stop_on_account_match,
+        stop_on_host_match=parsed.stop_on_host_match,
+        order=parsed.order,
+        dns_ttl=parsed.dns_ttl,
+        **job_kwargs
     )
 
     data_services = list()
-    data_usernames = list()
-    data_secrets = list()
-    data_targets = list()
     data_options = dict()
 
     # NOTE: Read data from files and CLI arguments
     logs.logger.debug('Reading data from files and CLI arguments')
 
     logs.logger.debug('Reading `services`')
-    data_services.extend(job.read_file(parsed.services_file))
-    data_services.extend(ele for ele in parsed.services if ele not in data_services)
+    data_services.extend(job.read_file(parsed.services_file, parsed.encoding))
+    data_services.extend(parsed.services)
+    data_services = list(dict.fromkeys(data_services))
 
     logs.logger.debug('Reading `usernames`')
-    data_usernames.extend(job.read_file(parsed.usernames_file))
-    data_usernames.extend(ele for ele in parsed.usernames if ele not in data_usernames)
+    # NOTE: Duplicates are removed by the job.
+    data_usernames = jobs.wordlists.Chain(job.read_file(parsed.usernames_file, parsed.encoding), parsed.usernames)
 
     logs.logger.debug('Reading `secrets`')
-    data_secrets.extend(job.read_file(parsed.secrets_file))
-    data_secrets.extend(ele for ele in parsed.secrets if ele not in data_secrets)
+    # NOTE: Duplicates are removed by the job.
+    if parsed.order == jobs.tasks.ORDER_RANKED:
+        secrets_file = job.read_ranked(parsed.secrets_file, parsed.weight_delimiter, parsed.encoding)
+    else:
+        secrets_file = job.read_file(parsed.secrets_file, parsed.encoding)
+    data_secrets = jobs.wordlists.Chain(secrets_file, parsed.secrets)
 
     logs.logger.debug('Reading `targets`')
-    data_targets.extend(job.read_file(parsed.targets_file))
-    data_targets.extend(ele for ele in parsed.targets if ele not in data_targets)
+    # NOTE: Duplicates are removed by the job.
+    data_targets = jobs.wordlists.Chain(job.read_file(parsed.targets_file, parsed.encoding), parsed.targets)
 
     logs.logger.debug('Reading combo file if present')
-    data_combos = job.read_combo(parsed.combo_file, parsed.combo_delimiter)
+    data_combos = job.read_combo(parsed.combo_file, parsed.combo_delimiter, parsed.encoding)
 
     if not data_services:
         raise exceptions.DataError('Missing `services` data! (-s/-sf)')
@@ -121,7 +174,7 @@ def parse_args(parser, args):
         except ValueError:
             raise exceptions.ConfigurationError(f'Invalid `options` argument: `{opt}`')
         attr, value = params.split('=')
-        data_options[service] = {attr: value}
+        data_options.setdefault(service, dict())[attr] = value
 
     job.start(data_services, data_targets, data_usernames, data_secrets, data_options, data_combos)
     return job.output
@@ -1,15 +1,28 @@
-from urllib import parse
-import itertools
+import array
+import asyncio
+import concurrent.futures
+import io
+import multiprocessing
+import queue
 import random
 import threading
 import time
-import urllib3
 
 from passtry import (
     exceptions,
     logs,
 )
 from passtry import services as services_module
+from passtry.jobs import (
+    adaptive,
+    checkpoints,
+    dedup,
+    metrics,
+    scheduler,
+    sinks,
+    tasks,
+    wordlists,
+)
 
 
 TASK_STRUCT = {
@@ -26,6 +39,14 @@ CONNECTIONS_TIMEOUT = 2
 TIME_WAIT = 0.1
 TIME_RANDOMIZE = 0
 TIME_STATISTICS = 5
+BUFFER_SIZE = 1000
+CONCURRENCY_NUMBER = 500
+BUFFER_TIMEOUT = 0.1
+BATCH_SIZE = 5
+PROCESSES_NUMBER = 1
+THREADS_PER_TARGET = 0
+TIME_CHECKPOINT = 60
+PROBE_THREADS = 100
 
 
 class Counter:
@@ -34,9 +55,9 @@ class Counter:
         self._value = 0
         self._lock = threading.Lock()
 
-    def inc(self):
+    def inc(self, value=1):
         with self._lock:
-            self._value += 1
+            self._value += value
 
     def get(self):
         with self._lock:
@@ -47,11 +68,27 @@ class Results:
 
     def __init__(self):
         self._items = list()
+        self._queues = list()
         self._lock = threading.Lock()
 
     def add(self, item):
         with self._lock:
             self._items.append(item)
+            for items in self._queues:
+                items.put(item)
+
+    def subscribe(self):
+        """Returns results added so far and a queue receiving the ones added later.
+
+        """
+        with self._lock:
+            items = queue.SimpleQueue()
+            self._queues.append(items)
+            return list(self._items), items
+
+    def unsubscribe(self, items):
+        with self._lock:
+            self._queues.remove(items)
 
     def set(self, items):
         with self._lock:
@@ -59,7 +96,43 @@ class Results:
 
     def get(self):
         with self._lock:
-            return self._items
+            return list(self._items)
+
+
+class Handle:
+    """Job started in a background thread, see `Job.start_background`.
+
+    """
+
+    def __init__(self, job, target):
+        self.job = job
+        self.exception = None
+        self.thread = threading.Thread(name='Job', target=self.run, args=(target,), daemon=True)
+
+    def run(self, target):
+        try:
+            target()
+        except BaseException as exc:
+            self.exception = exc
+        finally:
+            self.job.finished.set()
+
+    def stop(self):
+        self.job.stop()
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Returns `False` if the job is still running after `timeout` seconds, re-raises its exception if any.
+
+        """
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return False
+        if self.exception is not None:
+            raise self.exception
+        return True
 
 
 class Ignored:
@@ -68,17 +141,19 @@ class Ignored:
         self._items = dict()
         self._lock = threading.Lock()
 
-    def inc(self, item):
+    def inc(self, item, value=1):
         with self._lock:
             if item not in self._items:
                 self._items[item] = 0
-            self._items[item] += 1
+            self._items[item] += value
+            return self._items[item]
 
     def get(self, item):
+        return self._items.get(item, 0)
+
+    def items(self):
         with self._lock:
-            if item not in self._items:
-                self._items[item] = 0
-            return self._items[item]
+            return dict(self._items)
 
 
 class Job:
@@ -96,7 +171,26 @@ class Job:
             enable_statistics=False,
             time_statistics=TIME_STATISTICS,
             randomize=True,
-            output_file=None
+            output_file=None,
+            output_format=sinks.FORMAT_URI,
+            seed=None,
+            reuse_connections=False,
+            threads_per_target=THREADS_PER_TARGET,
+            checkpoint_file=None,
+            resume_file=None,
+            time_checkpoint=TIME_CHECKPOINT,
+            deduplicate=True,
+            dedup_error_rate=dedup.ERROR_RATE,
+            metrics_port=None,
+            metrics_file=None,
+            adaptive_concurrency=False,
+            enable_probe=False,
+            stop_on_account_match=False,
+            stop_on_host_match=False,
+            order=None,
+            on_result=None,
+            on_progress=None,
+            dns_ttl=services_module.resolver.TTL
         ):
         self.threads_number = threads_number
         self.failed_number = failed_number
@@ -109,19 +203,54 @@ class Job:
         self.enable_statistics = enable_statistics
         self.time_statistics = time_statistics
         self.randomize = randomize
+        # NOTE: `randomize` picks between the original orders, `order` takes precedence.
+        self.order = order or (tasks.ORDER_RANDOM if randomize else tasks.ORDER_SEQUENTIAL)
+        if self.order not in tasks.ORDERS:
+            raise exceptions.ConfigurationError(f'Unknown order `{self.order}`')
         self.output_file = output_file
+        self.output_format = output_format
+        self.sink = None if output_file is None else sinks.Sink(output_file, output_format)
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.reuse_connections = reuse_connections
+        self.threads_per_target = threads_per_target
+        self.checkpoint_file = checkpoint_file
+        self.resume_file = resume_file
+        self.time_checkpoint = time_checkpoint
+        self.deduplicate = deduplicate
+        self.dedup_error_rate = dedup_error_rate
+        self.metrics_port = metrics_port
+        self.metrics_file = metrics_file
+        self.metrics = metrics.Metrics()
+        self.metrics_server = None
+        self.adaptive_concurrency = adaptive_concurrency
+        self.enable_probe = enable_probe
+        self.stop_on_account_match = stop_on_account_match
+        self.stop_on_host_match = stop_on_host_match
+        self.matched = set()
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.dns_ttl = dns_ttl
+        self.callbacks = None
+        self.finished = threading.Event()
+        self.checkpoint_lock = threading.Lock()
+        self.stopped = False
+        self.shard = 0
+        self.shards = 1
+        self.position = None
         self.attempts = Counter()
         self.successful = Counter()
         self.failed = Counter()
         self.results = Results()
         self.ignored = Ignored()
-        self.tasks = list()
+        self.scheduler = scheduler.Scheduler(BUFFER_SIZE, threads_per_target, self.get_key)
+        self.controller = adaptive.Controller(self.scheduler, threads_number) if adaptive_concurrency else None
+        self.space = None
         self.total = None
+        self.produced = 0
+        self.exhausted = threading.Event()
         self.running = False
+        self.workers = 0
         self._output = None
-        # NOTE: Disable `Unverified HTTPS request is being made` warning.
-        # FIXME: Any better place to put this to guarantee execution?
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     def task_to_dict(self, task):
         try:
@@ -129,21 +258,26 @@ class Job:
         except KeyError:
             raise exceptions.DataError(f'Task {task} contains invalid number of elements')
 
-    def read_file(self, file_obj):
+    def read_file(self, file_obj, encoding=wordlists.ENCODING):
         if file_obj is None:
             result = list([None])
+        elif isinstance(file_obj, io.IOBase):
+            # NOTE: Files are memory-mapped and lines decoded on demand, nothing is loaded upfront.
+            result = wordlists.Wordlist(file_obj, encoding)
         else:
             result = list()
             for line in file_obj:
                 result.append(line.rstrip('\n'))
         return result
 
-    def read_combo(self, file_obj, delimiter=None):
+    def read_combo(self, file_obj, delimiter=None, encoding=wordlists.ENCODING):
+        if isinstance(file_obj, io.IOBase):
+            return wordlists.Combos(wordlists.Wordlist(file_obj, encoding), delimiter)
         result = list()
         if file_obj is not None:
             try:
                 for line in file_obj:
-                    cred = line.strip().split(delimiter)
+                    cred = line.strip().split(delimiter, 1)
                     if len(cred) < 2:
                         raise exceptions.DataError(f'Invalid combo file! Line: {line}')
                     else:
@@ -152,6 +286,21 @@ class Job:
                 raise exceptions.DataError('Error occured while processing combo file')
         return result
 
+    def read_ranked(self, file_obj, delimiter=None, encoding=wordlists.ENCODING):
+        """Reads `<weight><delimiter><secret>` lines, returns secrets with highest weights first.
+
+        """
+        if isinstance(file_obj, io.IOBase):
+            return wordlists.Ranked(wordlists.Wordlist(file_obj, encoding), delimiter)
+        result = list()
+        for line in file_obj:
+            try:
+                weight, secret = line.rstrip('\n').lstrip().split(delimiter, 1)
+                result.append((float(weight), secret))
+            except ValueError:
+                raise exceptions.DataError(f'Invalid ranked secrets file! Line: {line}')
+        return [secret for _, secret in sorted(result, key=lambda item: -item[0])]
+
     def prettify(self, task):
         """Returns URI string containing all information required for connection.
 
@@ -160,74 +309,415 @@ class Job:
         prettify_method = services_module.Service.registry[task_dict['services']].prettify
         return prettify_method(task_dict)
 
+    @property
+    def pending(self):
+        return self.total - self.produced + self.scheduler.pending
+
+    def get_key(self, batch):
+        return self.space.get_key(batch[0])
+
+    def iter_batches(self):
+        """Yields `(position, batch)` pairs, batches group tasks of a single account only when reusing connections.
+
+        Batches hold task indices, tasks are only built right before attempting them.
+
+        """
+        batches = tasks.Batches(self.space, BATCH_SIZE if self.reuse_connections else None)
+        size = len(batches)
+        if self.order == tasks.ORDER_RANDOM:
+            order = tasks.Permutation(size, self.seed)
+        elif self.order == tasks.ORDER_SEQUENTIAL:
+            # NOTE: Walking indices backwards keeps the order tasks used to be popped in.
+            order = range(size - 1, -1, -1)
+        else:
+            order = tasks.Order(batches, self.order)
+        start = self.shard if self.position is None else self.position
+        for position in range(start, size, self.shards):
+            yield position, array.array('Q', batches[order[position]])
+
+    def produce(self, position, batch, timeout):
+        # NOTE: Position moves along with the buffer, so checkpoints never skip nor repeat a batch.
+        with self.scheduler.lock:
+            # NOTE: Batches hold secrets of a single account, dropping them here keeps them out of the buffer.
+            if not (self.matched and self.space.get_account(batch[0]) in self.matched):
+                if not self.scheduler.put(batch, timeout):
+                    return False
+            self.produced += len(batch)
+            self.position = position + self.shards
+            return True
+
+    def worker_producer(self):
+        for position, batch in self.iter_batches():
+            while self.running:
+                if self.produce(position, batch, BUFFER_TIMEOUT):
+                    break
+            else:
+                break
+        self.exhausted.set()
+
+    def snapshot(self):
+        """Returns all the statistics at once, outcomes, results and pending tasks consistent with each other.
+
+        """
+        # NOTE: Outcomes and attempts are recorded under the scheduler lock (see `complete`).
+        with self.scheduler.lock:
+            return {
+                'total': self.total,
+                'pending': self.pending,
+                'attempts': self.attempts.get(),
+                'successful': self.successful.get(),
+                'failed': self.failed.get(),
+                'results': self.results.get(),
+                'ignored': self.ignored.items(),
+                'rate': self.metrics.get_rate(),
+            }
+
     def worker_stats(self):
         while self.running:
-            percentage = int(abs(len(self.tasks) / self.total * 100 - 100))
+            stats = self.snapshot()
+            percentage = int(abs(stats['pending'] / stats['total'] * 100 - 100))
             logs.logger.info(
-                f'Attempts: {self.attempts.get()} | '
-                f'Successful: {self.successful.get()} | '
-                f'Failed: {self.failed.get()} | '
-                f'Credentials: {len(self.results.get())} | '
-                f'Pending: {len(self.tasks)} / {self.total} [{percentage}%]'
+                f'Attempts: {stats["attempts"]} | '
+                f'Successful: {stats["successful"]} | '
+                f'Failed: {stats["failed"]} | '
+                f'Credentials: {len(stats["results"])} | '
+                f'Rate: {stats["rate"]:.1f}/s | '
+                f'Pending: {stats["pending"]} / {stats["total"]} [{percentage}%]'
             )
             time.sleep(self.time_statistics)
 
-    def worker_tasks(self):
-        thread = threading.current_thread()
+    def worker_metrics(self):
         while self.running:
+            time.sleep(self.time_statistics)
+            if self.running:
+                self.metrics.save(self.metrics_file)
+
+    def worker_progress(self):
+        while self.running:
+            time.sleep(self.time_statistics)
+            if self.running:
+                self.on_progress(self.snapshot())
+
+    def worker_results(self):
+        for result in self.iter_results():
             try:
-                if self.randomize:
-                    task = self.tasks.pop(random.randrange(len(self.tasks)))
-                else:
-                    task = self.tasks.pop()
-            except (ValueError, IndexError):
-                self.running = False
+                self.on_result(result)
+            except Exception:
+                logs.logger.exception(f'Result callback failed: {result}')
+
+    def iter_results(self):
+        """Yields results (including ones found before the call) as they are found, until the job finishes.
+
+        """
+        found, results = self.results.subscribe()
+        try:
+            yield from found
+            while True:
+                try:
+                    yield results.get(timeout=BUFFER_TIMEOUT)
+                except queue.Empty:
+                    if self.finished.is_set() and results.empty():
+                        break
+        finally:
+            self.results.unsubscribe(results)
+
+    def start_callbacks(self):
+        if self.on_result is not None:
+            self.callbacks = threading.Thread(name='Results', target=self.worker_results, daemon=True)
+            self.callbacks.start()
+        if self.on_progress is not None:
+            threading.Thread(target=self.worker_progress, daemon=True).start()
+
+    def stop_callbacks(self):
+        # NOTE: Every result is passed to the callback before the job returns.
+        self.finished.set()
+        if self.callbacks is not None:
+            self.callbacks.join()
+            self.callbacks = None
+        if self.on_progress is not None:
+            self.on_progress(self.snapshot())
+
+    def worker_checkpoint(self):
+        while self.running:
+            time.sleep(self.time_checkpoint)
+            if self.running:
+                self.save_checkpoint()
+
+    def get_checkpoint(self):
+        """Returns progress record: position in the task space, tasks not completed yet, ignored counters and results.
+
+        """
+        return {
+            'total': self.total,
+            'inputs': self.space.get_fingerprint(),
+            'order': self.order,
+            'reuse_connections': self.reuse_connections,
+            'shard': self.shard,
+            'shards': self.shards,
+            'seed': self.seed,
+            'position': self.shard if self.position is None else self.position,
+            'produced': self.produced,
+            'outstanding': self.scheduler.snapshot(),
+            'excluded': None if self.space.excluded is None else checkpoints.pack(self.space.excluded),
+            'ignored': [list(key) + [value] for key, value in self.ignored.items().items()],
+            'results': self.results.get(),
+            'attempts': self.attempts.get(),
+            'successful': self.successful.get(),
+            'failed': self.failed.get(),
+        }
+
+    def save_checkpoint(self):
+        if self.checkpoint_file is None:
+            return
+        # NOTE: Computed once, reading wordlists through, workers are not held up by it.
+        self.space.get_fingerprint()
+        # NOTE: Holding the scheduler lock keeps the position, outstanding tasks and results consistent,
+        #       writing happens once it is released. Saves are serialized, an older state never replaces a newer one.
+        with self.checkpoint_lock:
+            with self.scheduler.lock:
+                state = self.get_checkpoint()
+            checkpoints.save(self.checkpoint_file, state)
+        logs.logger.debug(f'Checkpoint saved: {self.checkpoint_file}')
+
+    def load_checkpoint(self):
+        if self.resume_file is None:
+            return
+        state = checkpoints.load(self.resume_file)
+        # NOTE: Endpoints found unreachable before are dropped again instead of probing, so indices match.
+        if state['excluded'] is not None:
+            excluded = checkpoints.unpack(state['excluded'])
+            if len(excluded) != self.space.count_pairs_endpoints():
+                raise exceptions.DataError(f'Checkpoint `{self.resume_file}` does not match the job (`excluded` differs)')
+            self.space.exclude(excluded)
+        self.total = self.get_total()
+        for key in ('total', 'order', 'reuse_connections', 'shard', 'shards'):
+            if state[key] != getattr(self, key):
+                raise exceptions.DataError(f'Checkpoint `{self.resume_file}` does not match the job (`{key}` differs)')
+        # NOTE: Saved indices would run other credentials (or targets) against inputs of the same size.
+        if state['inputs'] != self.space.get_fingerprint():
+            raise exceptions.DataError(f'Checkpoint `{self.resume_file}` does not match the job (inputs differ)')
+        self.seed = state['seed']
+        self.position = state['position']
+        self.attempts.inc(state['attempts'])
+        self.successful.inc(state['successful'])
+        self.failed.inc(state['failed'])
+        for result in state['results']:
+            self.results.add(tuple(result))
+            self.stop_matched(tuple(result))
+        for service, port, host, value in state['ignored']:
+            key = (service, port, host)
+            if self.ignored.inc(key, value) >= self.failed_number and self.watch_failures:
+                self.scheduler.purge(key)
+        self.produced = state['produced']
+        outstanding = [array.array('Q', [idx]) for idx in state['outstanding']]
+        self.scheduler.extend(outstanding)
+        logs.logger.info(f'Resumed from {self.resume_file}: {len(outstanding)} outstanding tasks')
+
+    def resolve(self):
+        """Resolves every target once upfront, services connect to the cached addresses (see `Resolver`).
+
+        """
+        services_module.RESOLVER.ttl = self.dns_ttl
+        hosts = self.space.get_hostnames()
+        logs.logger.debug(f'Resolving {len(hosts)} targets')
+        for host in services_module.RESOLVER.prefetch(hosts):
+            logs.logger.info(f'Unable to resolve: {host}')
+
+    def get_total(self):
+        return len(range(self.shard, len(self.space), self.shards))
+
+    def probe(self):
+        """Drops endpoints failing the service probe (see `Service.probe`) before any of their tasks are produced.
+
+        """
+        endpoints_number = self.space.count_pairs_endpoints() if self.space.credentials else 0
+        if not endpoints_number:
+            return
+        logs.logger.info(f'Probing {endpoints_number} endpoints...')
+        excluded = bytearray(endpoints_number)
+        workers = min(PROBE_THREADS, endpoints_number)
+
+        def check(endpoint):
+            service, port, host = endpoint
+            return self.get_service(endpoint).probe(host, port, self.connections_timeout)
+
+        def collect(futures):
+            for future in futures:
+                idx, endpoint = pending.pop(future)
+                if not future.result():
+                    logs.logger.debug(f'Unreachable: {endpoint}')
+                    excluded[idx] = 1
+
+        pending = dict()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            # NOTE: Endpoints are generated as probes finish, at most twice as many as workers are queued.
+            for idx, endpoint in enumerate(self.space.iter_all_endpoints()):
+                if len(pending) >= 2 * workers:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(check, endpoint)] = (idx, endpoint)
+            collect(list(pending))
+        self.space.exclude(excluded)
+        logs.logger.info(f'Dropped {excluded.count(1)} unreachable endpoints')
+
+    def is_finished(self):
+        return self.exhausted.is_set() and self.scheduler.is_empty()
+
+    def get_batch(self):
+        while self.running:
+            batch = self.scheduler.get(BUFFER_TIMEOUT)
+            if batch is not None:
+                return batch
+            # NOTE: Attempts still in progress may put their tasks back for retrying.
+            if self.is_finished():
                 break
+        return None
+
+    def get_service(self, task):
+        try:
+            return services_module.Service.registry[task[0]]
+        except KeyError:
+            raise exceptions.ConfigurationError(f'Unknown service `{task[0]}`')
+
+    def get_wait_time(self):
+        wait_time = self.time_wait
+        if self.time_randomize:
+            wait_time += round(random.uniform(0, self.time_randomize), 1)
+        return wait_time
+
+    def is_ignored(self, task, name):
+        # NOTE: Targets are purged after failures or matches, accounts only after matches.
+        if self.scheduler.is_purged((task[0], task[1], task[2])) or task[:4] in self.matched:
+            logs.logger.debug(f'/ {name} / Ignoring: {task}')
+            return True
+        return False
+
+    def stop_matched(self, task):
+        """Cancels remaining tasks of the matched account or of its whole target, if enabled.
+
+        """
+        if self.stop_on_host_match:
+            self.scheduler.purge((task[0], task[1], task[2]))
+        elif self.stop_on_account_match:
+            # NOTE: Buffered tasks of the account are skipped when handed out, further ones are not buffered.
+            self.matched.add(task[:4])
+
+    def handle_failure(self, task, name):
+        """Counts the failure, returns `True` if the task should be retried.
+
+        """
+        logs.logger.debug(f'/ {name} / Connection failed: {task}')
+        self.failed.inc()
+        if self.watch_failures:
+            # NOTE: Increase counter for failed connection for given service:port:host combination.
             unique_key = (task[0], task[1], task[2])
-            if self.watch_failures:
-                if self.ignored.get(unique_key) >= self.failed_number:
-                    # FIXME: Needs a better approach (erasing other occurrences). Current
-                    #        solution has a race condition, hence the `>=`.
-                    logs.logger.debug(f'/ {thread.name} / Ignoring: {task}')
-                    continue
-            try:
-                cls = services_module.Service.registry[task[0]]
-            except KeyError:
-                raise exceptions.ConfigurationError(f'Unknown service `{task[0]}`')
+            logs.logger.debug(f'/ {name} / Increasing ignored count: {unique_key}')
+            if self.ignored.inc(unique_key) >= self.failed_number:
+                # NOTE: Dropping all the pending tasks of given service:port:host combination at once.
+                logs.logger.debug(f'/ {name} / Purging: {unique_key}')
+                self.scheduler.purge(unique_key)
+        if self.retry_failed:
+            logs.logger.debug(f'/ {name} / Putting back: {task}')
+            return True
+        return False
+
+    def handle_success(self, task, result, name):
+        self.successful.inc()
+        logs.logger.debug(f'/ {name} / Connection successful: {task}')
+        if result:
+            logs.logger.debug(f'/ {name} / [VALIDATED] credentials: {task}')
+            uri = self.prettify(task)
+            print(uri)
+            self.results.add(task)
+            self.stop_matched(task)
+            if self.sink is not None:
+                self.sink.add(task, uri)
+            # NOTE: Finish work if abort on first match is enabled.
+            if self.first_match:
+                # FIXME: Same issues as with ignored: a matching password can end up
+                #        in two different threads if small number of tasks. Edge case
+                #        but still a case.
+                self.running = False
+
+    def observe(self, task, duration, outcome):
+        self.metrics.record(task, duration, outcome)
+        if self.controller is not None:
+            self.controller.record((task[0], task[1], task[2]), duration, outcome == 'failed')
+
+    def complete(self, batch, task, name, result=None, failed=False):
+        """Handles the outcome of the first task of a batch and advances the batch.
+
+        """
+        # NOTE: Outcome and progress are recorded at once, checkpoints see either both or none.
+        #       Attempts are counted once finished as well, those in progress are still outstanding.
+        with self.scheduler.lock:
             self.attempts.inc()
-            logs.logger.debug(f'/ {thread.name} / Executing: {task}')
-            try:
-                result = cls.execute(task, self.connections_timeout)
-            except exceptions.ConnectionFailed:
-                logs.logger.debug(f'/ {thread.name} / Connection failed: {task}')
-                self.failed.inc()
-                if self.watch_failures:
-                    # NOTE: Increase counter for failed connection for given service:port:host combination.
-                    logs.logger.debug(f'/ {thread.name} / Increasing ignored count: {unique_key}')
-                    self.ignored.inc(unique_key)
-                if self.retry_failed:
-                    logs.logger.debug(f'/ {thread.name} / Putting back: {task}')
-                    self.tasks.append(task)
+            if failed:
+                retry = self.handle_failure(task, name)
             else:
-                self.successful.inc()
-                logs.logger.debug(f'/ {thread.name} / Connection successful: {task}')
-                if result:
-                    logs.logger.debug(f'/ {thread.name} / [VALIDATED] credentials: {task}')
-                    print(self.prettify(task))
-                    self.results.add(task)
-                    # NOTE: Finish work if abort on first match is enabled.
-                    if self.first_match:
-                        # FIXME: Same issues as with ignored: a matching password can end up
-                        #        in two different threads if small number of tasks. Edge case
-                        #        but still a case.
-                        self.tasks.clear()
-                        self.running = False
-                        break
-            wait_time = self.time_wait
-            if self.time_randomize:
-                wait_time += round(random.uniform(0, self.time_randomize), 1)
+                self.handle_success(task, result, name)
+                retry = False
+            self.scheduler.advance(batch, retry)
+
+    def execute(self, batch, name):
+        """Runs an attempt for the first task of a batch.
+
+        """
+        task = self.space[batch[0]]
+        if self.is_ignored(task, name):
+            self.scheduler.advance(batch)
+            return
+        cls = self.get_service(task)
+        logs.logger.debug(f'/ {name} / Executing: {task}')
+        self.metrics.start(task)
+        started = time.monotonic()
+        try:
+            if self.reuse_connections:
+                result = cls.session_execute(task, self.connections_timeout)
+            else:
+                result = cls.execute(task, self.connections_timeout)
+        except exceptions.ConnectionFailed:
+            self.observe(task, time.monotonic() - started, 'failed')
+            self.complete(batch, task, name, failed=True)
+        else:
+            self.observe(task, time.monotonic() - started, 'matched' if result else 'rejected')
+            self.complete(batch, task, name, result)
+        wait_time = self.get_wait_time()
+        # NOTE: Sleeping drops the GIL even for no time, holding up the other workers.
+        if wait_time and self.running:
             time.sleep(wait_time)
 
+    def worker_tasks(self):
+        thread = threading.current_thread()
+        try:
+            while self.running:
+                batch = self.get_batch()
+                if batch is None:
+                    self.running = False
+                    break
+                try:
+                    while batch and self.running:
+                        size = len(batch)
+                        try:
+                            self.execute(batch, thread.name)
+                        except Exception:
+                            logs.logger.exception(f'/ {thread.name} / Attempt failed unexpectedly: task {batch[0]}')
+                            # NOTE: Task is dropped unless already completed, the worker goes on with the next one.
+                            if len(batch) == size:
+                                self.scheduler.advance(batch)
+                finally:
+                    # NOTE: Completed batches are returned already, tasks not attempted on stopping are kept
+                    #       for the checkpoint.
+                    if batch:
+                        self.scheduler.done(batch, retry=True)
+        finally:
+            services_module.close_sessions()
+            # NOTE: Producer stops along with the last worker, it would wait for a free slot forever otherwise.
+            with self.scheduler.lock:
+                self.workers -= 1
+                if not self.workers:
+                    self.running = False
+
     @property
     def output(self):
         """Returns list of URIs with confirmed credentials.
@@ -237,26 +727,7 @@ class Job:
             self._output = [self.prettify(result) for result in self.results.get() if result]
         return self._output
 
-    def put(self, service, ports, target, username, secret, service_options):
-        try:
-            host, port = target.split(':')
-        except ValueError:
-            host, port = target, None
-        if port:
-            self.tasks.append((service, int(port), host, username, secret, service_options))
-        else:
-            for port in ports.split(','):
-                try:
-                    port = int(port)
-                except ValueError:
-                    pass
-                else:
-                    self.tasks.append((service, port, host, username, secret, service_options))
-
-    def start(self, services, targets, usernames=None, secrets=None, options=None, combos=None):
-        """Main entry point.
-
-        """
+    def prepare(self, services, targets, usernames=None, secrets=None, options=None, combos=None):
         if options is None:
             options = dict()
         if combos is None:
@@ -270,22 +741,64 @@ class Job:
             srv = service.split(':')
             if len(srv) == 1:
                 try:
-                    srv.append(str(services_module.Service.registry[srv[0]].port))
+                    srv.append(str(services_module.Service.registry.get_port(srv[0])))
                 except KeyError:
                     raise exceptions.ConfigurationError(f'Unknown service `{srv[0]}`!')
             services[idx] = srv
 
+        if self.deduplicate:
+            logs.logger.debug('Removing duplicates')
+            usernames, secrets, combos = dedup.deduplicate(usernames, secrets, combos, self.dedup_error_rate)
+            targets, _ = dedup.unique(targets, self.dedup_error_rate)
+
         logs.logger.info('Adding tasks...')
-        creds = list(itertools.product(usernames, secrets))
-        creds.extend(combos)
-        for prod in itertools.product(services, targets, creds):
-            service, ports = prod[0]
-            service_options = options.get(service, None)
-            username, secret = prod[2]
-            self.put(service, ports, prod[1], username, secret, service_options)
-
-        self.total = len(self.tasks)
+        self.space = tasks.TaskSpace(services, targets, usernames, secrets, options, combos)
+        self.resolve()
+        # NOTE: Resumed jobs drop endpoints recorded in the checkpoint instead.
+        if self.enable_probe and self.resume_file is None:
+            self.probe()
+        self.total = self.get_total()
         logs.logger.info(f'Added {self.total} tasks')
+        self.load_checkpoint()
+
+    def open_outputs(self):
+        """Sets up services, starts writing results, checkpoints and metrics, sets the job running.
+
+        """
+        if self.sink is not None:
+            self.sink.open()
+        if self.metrics_port is not None:
+            try:
+                self.metrics_server = metrics.Server(self.metrics_port, self.metrics)
+            except OSError as exc:
+                raise exceptions.ConfigurationError(f'Unable to serve metrics on port {self.metrics_port}: {exc}')
+            self.metrics_server.start()
+            logs.logger.info(f'Serving metrics on port {self.metrics_port}')
+        self.running = not self.stopped
+        for service, endpoints in self.space.count_endpoints().items():
+            self.get_service((service,)).setup(endpoints, self.threads_number)
+        self.start_callbacks()
+        if self.checkpoint_file:
+            threading.Thread(target=self.worker_checkpoint, daemon=True).start()
+        if self.metrics_file:
+            threading.Thread(target=self.worker_metrics, daemon=True).start()
+
+    def close_outputs(self):
+        # NOTE: Saving progress on interruption (e.g. `KeyboardInterrupt`) as well as on completion.
+        self.running = False
+        if self.sink is not None:
+            self.sink.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.metrics_file:
+            self.metrics.save(self.metrics_file)
+        self.save_checkpoint()
+        for service, _ in self.space.services:
+            self.get_service((service,)).teardown()
+        self.stop_callbacks()
+
+    def run(self):
         threads = [
             threading.Thread(
                 name='Worker-' + str(idx),
@@ -294,7 +807,11 @@ class Job:
             ) for idx in range(self.threads_number)
         ]
 
-        self.running = True
+        producer = threading.Thread(name='Producer', target=self.worker_producer, daemon=True)
+        threads.append(producer)
+        self.workers = self.threads_number
+
+        self.open_outputs()
 
         logs.logger.info('Running')
         for thread in threads:
@@ -305,9 +822,13 @@ class Job:
             stats.start()
             threads.append(stats)
 
-        for thread in threads:
-            thread.join()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self.close_outputs()
 
+    def finish(self):
         if self.first_match:
             if len(self.results.get()):
                 self.results.set([self.results.get()[0]])
@@ -315,8 +836,234 @@ class Job:
         failed = self.failed.get()
         if failed:
             logs.logger.info(f'Connection failed {failed} times')
-        if self.output:
-            if self.output_file:
-                # NOTE: Write order doesn't matter.
-                with open(self.output_file, 'a+') as fil:
-                    fil.writelines(self.output)
+
+    def start(self, services, targets, usernames=None, secrets=None, options=None, combos=None):
+        """Main entry point.
+
+        """
+        self.prepare(services, targets, usernames, secrets, options, combos)
+        self.run()
+        self.finish()
+
+    def start_background(self, services, targets, usernames=None, secrets=None, options=None, combos=None):
+        """Same as `start`, but running in a background thread, returns a `Handle` to stop or wait for it.
+
+        """
+        handle = Handle(self, lambda: self.start(services, targets, usernames, secrets, options, combos))
+        handle.thread.start()
+        return handle
+
+    def stop(self):
+        """Stops the job, attempts in progress are completed.
+
+        """
+        self.stopped = True
+        self.running = False
+
+
+class AsyncJob(Job):
+    """Runs attempts as coroutines, at most `concurrency_number` of them at once.
+
+    Services without native `async_execute` support are run in a pool of `threads_number` threads.
+
+    """
+
+    def __init__(self, *args, concurrency_number=CONCURRENCY_NUMBER, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.reuse_connections:
+            raise exceptions.ConfigurationError('Reusing connections is not supported by asynchronous jobs')
+        self.concurrency_number = concurrency_number
+        if self.adaptive_concurrency:
+            self.controller = adaptive.Controller(self.scheduler, concurrency_number)
+
+    def fill(self, batches):
+        while self.scheduler.pending < self.scheduler.size:
+            item = next(batches, None)
+            if item is None:
+                self.exhausted.set()
+                break
+            self.produce(*item, 0)
+
+    async def attempt(self, batch, semaphore):
+        name = asyncio.current_task().get_name()
+        try:
+            while batch and self.running:
+                task = self.space[batch[0]]
+                if self.is_ignored(task, name):
+                    self.scheduler.advance(batch)
+                    continue
+                cls = self.get_service(task)
+                logs.logger.debug(f'/ {name} / Executing: {task}')
+                self.metrics.start(task)
+                started = time.monotonic()
+                try:
+                    if cls.async_execute is None:
+                        loop = asyncio.get_running_loop()
+                        result = await loop.run_in_executor(None, cls.execute, task, self.connections_timeout)
+                    else:
+                        result = await cls.async_execute(task, self.connections_timeout)
+                except exceptions.ConnectionFailed:
+                    self.observe(task, time.monotonic() - started, 'failed')
+                    self.complete(batch, task, name, failed=True)
+                else:
+                    self.observe(task, time.monotonic() - started, 'matched' if result else 'rejected')
+                    self.complete(batch, task, name, result)
+                if self.running:
+                    await asyncio.sleep(self.get_wait_time())
+        finally:
+            if batch:
+                self.scheduler.done(batch, retry=True)
+            semaphore.release()
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.threads_number)
+        loop.set_default_executor(executor)
+        semaphore = asyncio.Semaphore(self.concurrency_number)
+        batches = self.iter_batches()
+        pending = set()
+        while self.running:
+            await semaphore.acquire()
+            self.fill(batches)
+            batch = self.scheduler.get(0) if self.running else None
+            if batch is None:
+                semaphore.release()
+                if not self.running or not pending or self.is_finished():
+                    break
+                # NOTE: Attempts in progress free up their targets and may put tasks back for retrying.
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            coro = asyncio.create_task(self.attempt(batch, semaphore))
+            pending.add(coro)
+            coro.add_done_callback(pending.discard)
+        self.running = False
+        await asyncio.gather(*pending)
+        executor.shutdown()
+
+    def run(self):
+        self.open_outputs()
+        logs.logger.info('Running')
+        if self.enable_statistics:
+            stats = threading.Thread(target=self.worker_stats, daemon=True)
+            stats.start()
+        try:
+            asyncio.run(self.run_async())
+        finally:
+            self.close_outputs()
+
+
+def run_shard(job_class, job_kwargs, space, shard, shards, loglevel, stop):
+    """Runs a single partition of the task space, executed in a child process by `ProcessJob`.
+
+    """
+    logs.init(loglevel)
+    job = job_class(**job_kwargs)
+    job.space = space
+    job.shard = shard
+    job.shards = shards
+    job.total = job.get_total()
+    # NOTE: Every process keeps its own checkpoint and metrics files, and serves metrics on its own port.
+    if job.checkpoint_file:
+        job.checkpoint_file = f'{job.checkpoint_file}.{shard}'
+    if job.resume_file:
+        job.resume_file = f'{job.resume_file}.{shard}'
+        job.load_checkpoint()
+    if job.metrics_file:
+        job.metrics_file = f'{job.metrics_file}.{shard}'
+    if job.metrics_port is not None:
+        job.metrics_port += shard
+
+    def watch_stop():
+        stop.wait()
+        job.running = False
+
+    threading.Thread(target=watch_stop, daemon=True).start()
+    if not stop.is_set():
+        job.run()
+    if job.first_match and job.results.get():
+        stop.set()
+    return {
+        'attempts': job.attempts.get(),
+        'successful': job.successful.get(),
+        'failed': job.failed.get(),
+        'results': job.results.get(),
+        'ignored': job.ignored.items(),
+    }
+
+
+class ProcessJob(Job):
+    """Partitions the task space across `processes_number` processes, each running its own `job_class` workers.
+
+    Failures are counted separately by every process (hence `failed_number` applies per process),
+    matches stop accounts and targets only within the process finding them.
+    Counters are merged once the processes finish.
+
+    """
+
+    def __init__(self, processes_number=PROCESSES_NUMBER, job_class=Job, job_kwargs=None, **kwargs):
+        super().__init__(**kwargs)
+        self.processes_number = processes_number
+        self.job_class = job_class
+        # NOTE: Processes share the seed to walk the same permutation.
+        self.job_kwargs = dict(kwargs, **(job_kwargs or dict()), seed=self.seed)
+        # NOTE: Callbacks are run by this process, once results of the processes are merged.
+        self.job_kwargs.pop('on_result', None)
+        self.job_kwargs.pop('on_progress', None)
+        self.stop_event = None
+        # NOTE: Results are appended to the output file by the processes as they are found.
+        self.sink = None
+        # NOTE: Resuming processes drop endpoints recorded in their checkpoints.
+        if self.resume_file:
+            self.enable_probe = False
+        self.checkpoint_file = None
+        self.resume_file = None
+        self.metrics_port = None
+        self.metrics_file = None
+
+    def merge(self, stats):
+        self.attempts.inc(stats['attempts'])
+        self.successful.inc(stats['successful'])
+        self.failed.inc(stats['failed'])
+        for result in stats['results']:
+            self.results.add(result)
+        for key, value in stats['ignored'].items():
+            self.ignored.inc(key, value)
+
+    def stop(self):
+        super().stop()
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def run(self):
+        self.running = not self.stopped
+        for service, endpoints in self.space.count_endpoints().items():
+            self.get_service((service,)).setup(endpoints, self.threads_number)
+        self.start_callbacks()
+        logs.logger.info(f'Running {self.processes_number} processes')
+        try:
+            with multiprocessing.Manager() as manager:
+                stop = self.stop_event = manager.Event()
+                if self.stopped:
+                    stop.set()
+                with concurrent.futures.ProcessPoolExecutor(max_workers=self.processes_number) as executor:
+                    futures = [
+                        executor.submit(
+                            run_shard,
+                            self.job_class,
+                            self.job_kwargs,
+                            self.space,
+                            shard,
+                            self.processes_number,
+                            logs.logger.level,
+                            stop,
+                        ) for shard in range(self.processes_number)
+                    ]
+                    for future in concurrent.futures.as_completed(futures):
+                        self.merge(future.result())
+                stop.set()
+        finally:
+            self.stop_event = None
+            self.running = False
+            for service, _ in self.space.services:
+                self.get_service((service,)).teardown()
+            self.stop_callbacks()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from passtry import logs
+
+
+__all__ = ['Controller', 'Limit']
+
+
+INITIAL = 1
+DECREASE = 0.5
+SMOOTHING = 0.2
+LATENCY_TOLERANCE = 2
+BASELINE_DRIFT = 1.001
+
+
+class Limit:
+    """Additive increase, multiplicative decrease limit of concurrent attempts.
+
+    Starts by adding one per success (doubling every round trip), after the first decrease grows
+    by one per `value` successes. Decreases on a failure or when the smoothed latency of successes
+    exceeds `LATENCY_TOLERANCE` times the lowest one seen, at most once per round trip.
+
+    """
+
+    def __init__(self, maximum, initial=INITIAL):
+        self.maximum = maximum
+        self.value = float(min(initial, maximum))
+        self.starting = True
+        self.latency = None
+        self.baseline = None
+        self.decreased = 0
+
+    @property
+    def current(self):
+        return max(int(self.value), 1)
+
+    def decrease(self, now):
+        # NOTE: Attempts started before the previous decrease don't count.
+        if now - self.decreased < (self.latency or 0):
+            return
+        self.value = max(self.value * DECREASE, 1)
+        self.starting = False
+        self.decreased = now
+
+    def success(self, latency, now):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += SMOOTHING * (latency - self.latency)
+        # NOTE: Drifting up slowly, so a lasting change of the network is eventually accepted.
+        self.baseline = self.latency if self.baseline is None else min(self.latency, self.baseline * BASELINE_DRIFT)
+        if self.latency > self.baseline * LATENCY_TOLERANCE:
+            self.decrease(now)
+        else:
+            self.value = min(self.value + (1 if self.starting else 1 / self.value), self.maximum)
+
+    def failure(self, now):
+        self.decrease(now)
+
+
+class Controller:
+    """Sets scheduler limits of concurrent attempts, globally and per `(service, port, host)`, from outcomes of attempts.
+
+    """
+
+    def __init__(self, scheduler, maximum, initial=INITIAL):
+        self.scheduler = scheduler
+        self.maximum = maximum
+        self.initial = initial
+        self.total = Limit(maximum, initial)
+        self.targets = dict()
+        self.lock = threading.Lock()
+        scheduler.set_limit(self.total.current)
+        scheduler.set_target_limit(self.total.current)
+
+    def record(self, key, latency, failed):
+        now = time.monotonic()
+        with self.lock:
+            try:
+                target = self.targets[key]
+            except KeyError:
+                target = self.targets[key] = Limit(self.maximum, self.initial)
+            previous = self.total.current
+            for limit in (self.total, target):
+                if failed:
+                    limit.failure(now)
+                else:
+                    limit.success(latency, now)
+            if self.total.current != previous:
+                logs.logger.debug(f'Concurrency limit: {self.total.current}')
+            self.scheduler.set_limit(self.total.current)
+            self.scheduler.set_target_limit(target.current, key)
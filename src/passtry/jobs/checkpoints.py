@@ -0,0 +1,55 @@
+import base64
+import json
+import os
+import tempfile
+import zlib
+
+from passtry import exceptions
+
+
+__all__ = ['load', 'pack', 'save', 'unpack']
+
+
+VERSION = 7
+
+
+def save(path, state):
+    """Writes the state atomically, a crash while writing leaves the previous checkpoint intact.
+
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.passtry-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as fil:
+            json.dump(dict(state, version=VERSION), fil, separators=(',', ':'))
+            fil.flush()
+            os.fsync(fil.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load(path):
+    try:
+        with open(path) as fil:
+            state = json.load(fil)
+    except (OSError, ValueError) as exc:
+        raise exceptions.DataError(f'Unable to read checkpoint `{path}`: {exc}')
+    if state.get('version') != VERSION:
+        raise exceptions.DataError(f'Unsupported checkpoint version in `{path}`')
+    return state
+
+
+def pack(data):
+    """Returns bytes (e.g. endpoint flags) compressed into a JSON string.
+
+    """
+    return base64.b64encode(zlib.compress(bytes(data))).decode('ascii')
+
+
+def unpack(text):
+    try:
+        return bytearray(zlib.decompress(base64.b64decode(text)))
+    except (ValueError, zlib.error) as exc:
+        raise exceptions.DataError(f'Invalid checkpoint data: {exc}')
@@ -0,0 +1,191 @@
+import array
+import bisect
+import collections.abc
+import hashlib
+import math
+
+from passtry import logs
+from passtry.jobs import wordlists
+
+
+__all__ = ['ExactFilter', 'FingerprintFilter', 'Unique', 'create_filter', 'deduplicate', 'unique', 'update_digest']
+
+
+ERROR_RATE = 0.0001
+EXACT_LIMIT = 1 << 20
+# NOTE: Expected number of fingerprints compared for a key never added, in a half full table.
+PROBES = 2.5
+
+
+class ExactFilter:
+
+    def __init__(self):
+        self.items = set()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def add(self, key):
+        """Returns `True` if the key wasn't seen before.
+
+        """
+        if key in self.items:
+            return False
+        self.items.add(key)
+        return True
+
+
+class FingerprintFilter:
+    """Memory-bounded set of up to `capacity` keys, only a short fingerprint of each key is stored.
+
+    Fingerprints are kept in an open addressing table at most half full, so a key never added
+    matches about `PROBES` fingerprints. Their size (1, 2 or 4 bytes) is the smallest one keeping
+    the chance of reporting such a key as seen below `error_rate`.
+
+    """
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        bits = math.log2(PROBES / error_rate)
+        for typecode in 'BHI':
+            itemsize = array.array(typecode).itemsize
+            if itemsize * 8 >= bits:
+                break
+        self.fingerprint_shift = 64 - itemsize * 8
+        slots = 1 << (2 * max(capacity, 1) - 1).bit_length()
+        self.mask = slots - 1
+        self.table = array.array(typecode, bytes(slots * itemsize))
+
+    def locate(self, key):
+        """Returns the slot holding the key fingerprint (or an empty one to put it in) and the fingerprint.
+
+        """
+        # NOTE: Built-in `hash` is randomized per process, dropped false positives have to match across runs and shards.
+        value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        # NOTE: Zero marks empty slots.
+        fingerprint = (value >> self.fingerprint_shift) or 1
+        idx = value & self.mask
+        while True:
+            current = self.table[idx]
+            if not current or current == fingerprint:
+                return idx, fingerprint
+            idx = (idx + 1) & self.mask
+
+    def __contains__(self, key):
+        idx, _ = self.locate(key)
+        return bool(self.table[idx])
+
+    def add(self, key):
+        """Returns `True` if the key wasn't seen before (might be `False` for a new one, see `error_rate`).
+
+        """
+        idx, fingerprint = self.locate(key)
+        if self.table[idx]:
+            return False
+        self.table[idx] = fingerprint
+        return True
+
+
+def create_filter(capacity, error_rate=ERROR_RATE):
+    """Returns exact filter for up to `EXACT_LIMIT` keys, fingerprint filter for more.
+
+    """
+    if capacity <= EXACT_LIMIT:
+        return ExactFilter()
+    return FingerprintFilter(capacity, error_rate)
+
+
+def get_key(item):
+    if isinstance(item, str):
+        return item.encode(wordlists.ENCODING, 'surrogateescape')
+    # NOTE: Prefixed to never match a line of text.
+    return b'\0' + repr(item).encode(wordlists.ENCODING, 'surrogateescape')
+
+
+def iter_keys(sequence):
+    # NOTE: Keys of file lines are their raw bytes, no need to decode them.
+    if isinstance(sequence, wordlists.Wordlist):
+        yield from sequence.iter_raw()
+    elif isinstance(sequence, wordlists.Chain):
+        for part in sequence.parts:
+            yield from iter_keys(part)
+    else:
+        yield from map(get_key, sequence)
+
+
+def update_digest(digest, sequence):
+    """Feeds keys of all the items of a sequence to a `hashlib` digest.
+
+    """
+    if isinstance(sequence, Unique):
+        update_digest(digest, sequence.sequence)
+        digest.update(sequence.skipped.tobytes())
+        return
+    # NOTE: Line breaks separate keys, lines of wordlists never contain them.
+    for key in iter_keys(sequence):
+        digest.update(key + b'\n')
+
+
+class Unique(collections.abc.Sequence):
+    """View of a sequence without the items at `skipped` (sorted) indices.
+
+    """
+
+    def __init__(self, sequence, skipped):
+        self.sequence = sequence
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.sequence) - len(self.skipped)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Item {idx} out of range')
+        # NOTE: Shifting by the number of skipped items up to the result until it stops changing.
+        shift = bisect.bisect_right(self.skipped, idx)
+        while True:
+            current = bisect.bisect_right(self.skipped, idx + shift)
+            if current == shift:
+                return self.sequence[idx + shift]
+            shift = current
+
+
+def unique(sequence, error_rate=ERROR_RATE, exclude=None):
+    """Returns the sequence without repeated items (first occurrences are kept) and the filter of its items.
+
+    Items for which `exclude` returns `True` are dropped as well.
+
+    """
+    seen = create_filter(len(sequence), error_rate)
+    skipped = array.array('Q')
+    items = iter(sequence) if exclude else None
+    for idx, key in enumerate(iter_keys(sequence)):
+        new = seen.add(key)
+        if exclude and exclude(next(items)):
+            new = False
+        if not new:
+            skipped.append(idx)
+    if not skipped:
+        return sequence, seen
+    return Unique(sequence, skipped), seen
+
+
+def deduplicate(usernames, secrets, combos, error_rate=ERROR_RATE):
+    """Returns usernames, secrets and combos without duplicates, combos already in usernames x secrets are dropped.
+
+    """
+    usernames, usernames_seen = unique(usernames, error_rate)
+    secrets, secrets_seen = unique(secrets, error_rate)
+
+    def is_product(combo):
+        return get_key(combo[0]) in usernames_seen and get_key(combo[1]) in secrets_seen
+
+    total = len(combos)
+    combos, _ = unique(combos, error_rate, is_product if len(usernames) and len(secrets) else None)
+    skipped = sum(len(seq.skipped) for seq in (usernames, secrets) if isinstance(seq, Unique)) + total - len(combos)
+    if skipped:
+        logs.logger.info(f'Skipped {skipped} duplicates')
+    return usernames, secrets, combos
@@ -0,0 +1,192 @@
+import collections
+import http.server
+import os
+import tempfile
+import threading
+import time
+
+
+__all__ = ['Metrics', 'Server']
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RATE_WINDOW = 10
+OUTCOMES = ('matched', 'rejected', 'failed')
+
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        for idx, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = list()
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Rate:
+    """Number of events per second over the last `window` seconds, not thread-safe (see `Metrics.lock`).
+
+    """
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self.seconds = collections.deque()
+
+    def expire(self, now):
+        while self.seconds and self.seconds[0][0] <= now - self.window:
+            self.seconds.popleft()
+
+    def add(self, value=1):
+        now = int(time.monotonic())
+        if self.seconds and self.seconds[-1][0] == now:
+            self.seconds[-1][1] += value
+        else:
+            self.seconds.append([now, value])
+            self.expire(now)
+
+    def get(self):
+        self.expire(int(time.monotonic()))
+        return sum(value for _, value in self.seconds) / self.window
+
+
+def format_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Attempt latency histograms (per service and per target), outcomes, in-flight attempts and throughput.
+
+    Rendered in Prometheus text exposition format.
+
+    """
+
+    def __init__(self):
+        self.services = collections.defaultdict(Histogram)
+        self.targets = collections.defaultdict(Histogram)
+        self.outcomes = collections.Counter()
+        self.inflight = collections.Counter()
+        self.rate = Rate()
+        self.lock = threading.Lock()
+
+    def start(self, task):
+        with self.lock:
+            self.inflight[task[0]] += 1
+
+    def record(self, task, duration, outcome):
+        """Records a finished attempt, `outcome` is one of `OUTCOMES`.
+
+        """
+        service = task[0]
+        with self.lock:
+            self.inflight[service] -= 1
+            self.services[service].observe(duration)
+            # NOTE: Labels are formatted on rendering only.
+            self.targets[(service, task[2], task[1])].observe(duration)
+            self.outcomes[(service, outcome)] += 1
+            self.rate.add()
+
+    def get_rate(self):
+        """Returns finished attempts per second, the window is shared with (and updated by) the workers.
+
+        """
+        with self.lock:
+            return self.rate.get()
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP passtry_attempts_total Finished attempts by outcome (matched/rejected credentials or failed connection).',
+                '# TYPE passtry_attempts_total counter',
+            ]
+            for (service, outcome), value in sorted(self.outcomes.items()):
+                lines.append(f'passtry_attempts_total{{service="{format_label(service)}",outcome="{outcome}"}} {value}')
+            lines.extend([
+                '# HELP passtry_attempt_duration_seconds Attempt duration per service.',
+                '# TYPE passtry_attempt_duration_seconds histogram',
+            ])
+            for service, histogram in sorted(self.services.items()):
+                lines.extend(histogram.render('passtry_attempt_duration_seconds', f'service="{format_label(service)}"'))
+            lines.extend([
+                '# HELP passtry_target_attempt_duration_seconds Attempt duration per service and target.',
+                '# TYPE passtry_target_attempt_duration_seconds histogram',
+            ])
+            for (service, host, port), histogram in sorted(self.targets.items(), key=lambda item: str(item[0])):
+                labels = f'service="{format_label(service)}",target="{format_label(f"{host}:{port}")}"'
+                lines.extend(histogram.render('passtry_target_attempt_duration_seconds', labels))
+            lines.extend([
+                '# HELP passtry_inflight_attempts Attempts in progress.',
+                '# TYPE passtry_inflight_attempts gauge',
+            ])
+            for service, value in sorted(self.inflight.items()):
+                lines.append(f'passtry_inflight_attempts{{service="{format_label(service)}"}} {value}')
+            lines.extend([
+                f'# HELP passtry_attempts_per_second Finished attempts per second over the last {self.rate.window} seconds.',
+                '# TYPE passtry_attempts_per_second gauge',
+                f'passtry_attempts_per_second {self.rate.get()}',
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path):
+        """Rewrites the file atomically, readers never see a partial one.
+
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.passtry-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as fil:
+                fil.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    """Serves metrics over HTTP (any path) from a background thread.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, metrics, host='127.0.0.1'):
+        super().__init__((host, port), Handler)
+        self.metrics = metrics
+
+    def start(self):
+        threading.Thread(name='Metrics', target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,213 @@
+import collections
+import threading
+import time
+
+
+__all__ = ['Scheduler']
+
+
+class Scheduler:
+    """Buffers batches of tasks in per `(service, port, host)` queues and dispatches them round-robin.
+
+    At most `max_inflight` batches of a single target are handed out at once (`0` means no limit),
+    lower limits can be set at runtime, in total and per target (see `set_limit`, `set_target_limit`).
+    Purging a target drops all of its batches at once, including the ones added later.
+    Batches handed out are tracked until `done`, so `snapshot` accounts for every task not completed yet.
+
+    """
+
+    def __init__(self, size, max_inflight=0, get_key=None):
+        self.size = size
+        if get_key is not None:
+            self.get_key = get_key
+        self.max_inflight = max_inflight
+        self.buckets = dict()
+        self.counts = dict()
+        self.purged = set()
+        self.ready = collections.deque()
+        self.inflight = dict()
+        self.active = 0
+        self.limit = 0
+        self.target_limits = dict()
+        self.target_limit = 0
+        self.taken = dict()
+        self.pending = 0
+        # NOTE: Workers wait on `condition` for batches, producers on `not_full` for free slots, sharing the lock.
+        self.lock = threading.RLock()
+        self.condition = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+    @staticmethod
+    def get_key(batch):
+        """Returns `(service, port, host)` of a batch of task tuples, see `get_key` argument for other tasks.
+
+        """
+        task = batch[0]
+        return (task[0], task[1], task[2])
+
+    def is_empty(self):
+        with self.lock:
+            return not self.buckets and not self.inflight
+
+    def set_limit(self, value):
+        with self.lock:
+            if value > self.limit:
+                self.condition.notify_all()
+            self.limit = value
+
+    def set_target_limit(self, value, key=None):
+        """Sets the limit of a single target, or of the ones without a limit set if `key` is `None`.
+
+        """
+        with self.lock:
+            if key is None:
+                self.target_limit = value
+            else:
+                self.target_limits[key] = value
+            self.condition.notify_all()
+
+    def get_target_limit(self, key):
+        limit = self.target_limits.get(key, self.target_limit)
+        if self.max_inflight and (not limit or limit > self.max_inflight):
+            return self.max_inflight
+        return limit
+
+    def add(self, key, batch, urgent=False):
+        if key in self.purged:
+            return
+        try:
+            bucket = self.buckets[key]
+        except KeyError:
+            bucket = self.buckets[key] = collections.deque()
+            self.counts[key] = 0
+            if not urgent:
+                self.ready.append(key)
+        if urgent:
+            bucket.appendleft(batch)
+            # NOTE: Moving the target to the front of the line.
+            try:
+                self.ready.remove(key)
+            except ValueError:
+                pass
+            self.ready.appendleft(key)
+        else:
+            bucket.append(batch)
+        self.counts[key] += len(batch)
+        self.pending += len(batch)
+        self.condition.notify()
+
+    def put(self, batch, timeout=None):
+        """Adds a new batch (dropped if its target was purged), waits up to `timeout` seconds for a free slot.
+
+        """
+        with self.lock:
+            if self.pending >= self.size:
+                self.not_full.wait(timeout)
+                if self.pending >= self.size:
+                    return False
+            self.add(self.get_key(batch), batch)
+            return True
+
+    def extend(self, batches):
+        """Adds batches regardless of the buffer size.
+
+        """
+        with self.lock:
+            for batch in batches:
+                self.add(self.get_key(batch), batch)
+
+    def get(self, timeout=None):
+        """Returns a batch of the next target below the in-flight limit, `None` if none is available in time.
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while True:
+                for _ in range(len(self.ready)):
+                    if self.limit and self.active >= self.limit:
+                        break
+                    key = self.ready.popleft()
+                    limit = self.get_target_limit(key)
+                    if limit and self.inflight.get(key, 0) >= limit:
+                        self.ready.append(key)
+                        continue
+                    try:
+                        bucket = self.buckets[key]
+                    except KeyError:
+                        # NOTE: Target purged in the meantime.
+                        continue
+                    batch = bucket.popleft()
+                    if bucket:
+                        self.ready.append(key)
+                    else:
+                        del self.buckets[key]
+                    self.inflight[key] = self.inflight.get(key, 0) + 1
+                    self.active += 1
+                    self.taken[id(batch)] = (key, batch)
+                    self.counts[key] -= len(batch)
+                    if not self.counts[key]:
+                        del self.counts[key]
+                    self.pending -= len(batch)
+                    # NOTE: Producers only wait while the buffer is full.
+                    if self.pending < self.size <= self.pending + len(batch):
+                        self.not_full.notify()
+                    return batch
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+    def purge(self, key):
+        with self.lock:
+            self.purged.add(key)
+            if self.buckets.pop(key, None) is not None:
+                self.pending -= self.counts.pop(key)
+            self.not_full.notify_all()
+
+    def is_purged(self, key):
+        return key in self.purged
+
+    def advance(self, batch, retry=False):
+        """Marks the first task of a batch handed out as completed, or puts it back for retrying.
+
+        Retried tasks take precedence over other ones and ignore the buffer size.
+        Batches are returned (see `done`) along with their last task.
+
+        """
+        with self.lock:
+            retried = batch[:1]
+            del batch[0]
+            if retry:
+                self.add(self.get_key(retried), retried, urgent=True)
+            # NOTE: Returning a batch once completed saves taking the lock again for it.
+            if not batch:
+                self.done(batch)
+
+    def snapshot(self):
+        """Returns all the tasks either buffered or handed out, but not completed.
+
+        """
+        with self.lock:
+            result = [task for bucket in self.buckets.values() for batch in bucket for task in batch]
+            result.extend(task for _, batch in self.taken.values() for task in batch)
+            return result
+
+    def done(self, batch, retry=False):
+        """Returns a batch handed out, tasks left in it (e.g. on stopping) are put back if `retry` is set.
+
+        """
+        with self.lock:
+            try:
+                key, _ = self.taken.pop(id(batch))
+            except KeyError:
+                # NOTE: Returned already, see `advance`.
+                return
+            self.inflight[key] -= 1
+            self.active -= 1
+            if not self.inflight[key]:
+                del self.inflight[key]
+            if retry and batch:
+                self.add(key, batch, urgent=True)
+            # NOTE: A slot of the target is free, a worker waiting for it may take its next batch.
+            elif self.buckets:
+                self.condition.notify()
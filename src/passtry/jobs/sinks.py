@@ -0,0 +1,67 @@
+import json
+import queue
+import threading
+import time
+
+from passtry import exceptions
+
+
+__all__ = ['FORMATS', 'Sink']
+
+
+FORMAT_URI = 'uri'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_URI, FORMAT_JSONL)
+FIELDS = ('service', 'port', 'host', 'username', 'secret', 'options')
+
+
+class Sink:
+    """Appends results to a file as soon as they are found, one per line.
+
+    Results are queued and written by a single thread, so workers never wait for the file.
+
+    """
+
+    def __init__(self, path, output_format=FORMAT_URI):
+        if output_format not in FORMATS:
+            raise exceptions.ConfigurationError(f'Unknown output format `{output_format}`')
+        self.path = path
+        self.output_format = output_format
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def format(self, task, uri, found):
+        if self.output_format == FORMAT_JSONL:
+            return json.dumps(dict(zip(FIELDS, task), uri=uri, time=found))
+        return uri
+
+    def add(self, task, uri):
+        self.queue.put((task, uri, time.time()))
+
+    def worker(self, fil):
+        with fil:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                fil.write(self.format(*item) + '\n')
+                fil.flush()
+
+    def open(self):
+        # NOTE: Opening here, so an unwritable path fails before any attempt is made.
+        try:
+            fil = open(self.path, 'a')
+        except OSError as exc:
+            raise exceptions.ConfigurationError(f'Unable to open output file `{self.path}`: {exc}')
+        self.thread = threading.Thread(name='Sink', target=self.worker, args=(fil,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Writes all the queued results and closes the file.
+
+        """
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
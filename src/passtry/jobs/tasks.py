@@ -0,0 +1,565 @@
+import array
+import bisect
+import collections.abc
+import hashlib
+import ipaddress
+import itertools
+import random
+
+from passtry.jobs import dedup
+
+
+__all__ = ['Addresses', 'Batches', 'Hosts', 'Order', 'Permutation', 'Ranges', 'TaskSpace']
+
+
+PERMUTATION_ROUNDS = 4
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+ORDER_RANDOM = 'random'
+ORDER_SEQUENTIAL = 'sequential'
+ORDER_SECRET_MAJOR = 'secret-major'
+ORDER_USERNAME_MAJOR = 'username-major'
+ORDER_TARGET_INTERLEAVED = 'target-interleaved'
+# NOTE: Same as secret-major, secrets are expected sorted by weight (see `wordlists.Ranked`).
+ORDER_RANKED = 'ranked'
+ORDERS = (ORDER_RANDOM, ORDER_SEQUENTIAL, ORDER_SECRET_MAJOR, ORDER_USERNAME_MAJOR, ORDER_TARGET_INTERLEAVED, ORDER_RANKED)
+
+
+class Ranges(collections.abc.Sequence):
+    """Concatenated `range`s of integers, indexable without expanding them.
+
+    """
+
+    def __init__(self, ranges):
+        self.ranges = [part for part in ranges if len(part)]
+        self.offsets = list(itertools.accumulate((len(part) for part in self.ranges), initial=0))
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Item {idx} out of range')
+        part = bisect.bisect_right(self.offsets, idx) - 1
+        return self.ranges[part][idx - self.offsets[part]]
+
+    def __contains__(self, value):
+        return any(value in part for part in self.ranges)
+
+    def index(self, value, *args):
+        for offset, part in zip(self.offsets, self.ranges):
+            if value in part:
+                return offset + part.index(value)
+        raise ValueError(f'{value} is not in ranges')
+
+
+class Addresses(Ranges):
+    """IPv4 addresses of a CIDR block (`10.0.0.0/16`) or a range (`10.0.0.1-10.0.0.50`, `10.0.0.1-50`).
+
+    """
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return super().__getitem__(idx)
+        return str(ipaddress.IPv4Address(super().__getitem__(idx)))
+
+    def __contains__(self, value):
+        try:
+            return super().__contains__(int(ipaddress.IPv4Address(value)))
+        except ValueError:
+            return False
+
+    def index(self, value, *args):
+        try:
+            return super().index(int(ipaddress.IPv4Address(value)))
+        except ipaddress.AddressValueError:
+            raise ValueError(f'{value} is not in addresses')
+
+
+class Hosts(collections.abc.Sequence):
+    """Names of consecutive targets (`targets[start:stop]`), each one read from the targets on demand.
+
+    """
+
+    def __init__(self, targets, start, stop):
+        self.targets = targets
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Host {idx} out of range')
+        return TaskSpace.parse_target(self.targets[self.start + idx])[0]
+
+    def __iter__(self):
+        for idx in range(self.start, self.stop):
+            yield TaskSpace.parse_target(self.targets[idx])[0]
+
+
+class TaskSpace:
+    """Lazy, indexable view of all `(service, port, host, username, secret, options)` tasks.
+
+    Tasks are never materialized, each one is decoded from its index on demand.
+    Neither are hosts of address ranges nor port ranges, the number of tasks is computed from their sizes.
+    Targets are read once to find runs of them sharing ports, names are read from `targets` again on demand.
+
+    """
+
+    def __init__(self, services, targets, usernames=None, secrets=None, options=None, combos=None):
+        self.services = [(service, self.parse_ports(ports)) for service, ports in services]
+        self.targets = targets if isinstance(targets, collections.abc.Sequence) else list(targets)
+        self.runs = list()
+        self.usernames = usernames or list()
+        self.secrets = secrets or list()
+        self.options = options or dict()
+        self.combos = combos or list()
+        self.products = len(self.usernames) * len(self.secrets)
+        self.credentials = self.products + len(self.combos)
+        # NOTE: Runs are address ranges or `Hosts` of consecutive names with the same ports, as `(hosts, ports)`.
+        run_port = start = None
+        for idx, target in enumerate(self.targets):
+            host, port = self.parse_target(target)
+            hosts = self.parse_hosts(host)
+            if not isinstance(hosts, Addresses):
+                if start is None or port != run_port:
+                    self.add_run(start, idx, run_port)
+                    run_port, start = port, idx
+                continue
+            self.add_run(start, idx, run_port)
+            self.runs.append((hosts, self.parse_ports(port) if port else None))
+            start = None
+        self.add_run(start, len(self.targets), run_port)
+        self.excluded = None
+        self.fingerprint = None
+        self.build()
+
+    def add_run(self, start, stop, port):
+        if start is not None:
+            self.runs.append((Hosts(self.targets, start, stop), self.parse_ports(port) if port else None))
+
+    def build(self):
+        # NOTE: Groups are single hosts of `(service, run)` pairs. Pairs are split into segments, runs of hosts
+        #       sharing ports (differing only by excluded endpoints). `self.offsets` keeps the first task index
+        #       and `self.groups` the first group index of each segment.
+        self.segments = list()
+        self.offsets = array.array('Q')
+        self.groups = array.array('Q')
+        total = 0
+        groups = 0
+        endpoint = 0
+        for service, hosts, ports in self.iter_pairs():
+            size = len(hosts) * len(ports)
+            excluded = None if self.excluded is None else self.excluded[endpoint:endpoint + size]
+            endpoint += size
+            for segment in self.split(service, ports, hosts, excluded):
+                _, ports, _, start, stop = segment
+                self.segments.append(segment)
+                self.offsets.append(total)
+                self.groups.append(groups)
+                total += self.credentials * len(ports) * (stop - start)
+                groups += stop - start
+        self.total = total
+        self.groups_number = groups
+
+    def iter_pairs(self):
+        """Yields `(service, hosts, ports)` of all the `(service, run)` pairs, runs of targets in their order.
+
+        """
+        for service, service_ports in self.services:
+            for hosts, target_ports in self.runs:
+                yield service, hosts, target_ports or service_ports
+
+    @staticmethod
+    def split(service, ports, hosts, excluded):
+        """Yields `(service, ports, hosts, start, stop)` segments, hosts with excluded ports get segments of their own.
+
+        `excluded` flags endpoints of the pair, host by host, hosts with all the ports excluded are left out.
+
+        """
+        width = len(ports)
+        if not excluded or not excluded.count(1):
+            if hosts and width:
+                yield service, ports, hosts, 0, len(hosts)
+            return
+        start = 0
+        for idx in range(len(hosts)):
+            row = excluded[idx * width:(idx + 1) * width]
+            dropped = row.count(1)
+            if not dropped:
+                continue
+            if idx > start:
+                yield service, ports, hosts, start, idx
+            if dropped < width:
+                yield service, [port for port, flag in zip(ports, row) if not flag], hosts, idx, idx + 1
+            start = idx + 1
+        if start < len(hosts):
+            yield service, ports, hosts, start, len(hosts)
+
+    def count_pairs_endpoints(self):
+        """Returns number of endpoints of all the pairs, excluded ones included.
+
+        """
+        return sum(len(hosts) * len(ports) for _, hosts, ports in self.iter_pairs())
+
+    def iter_all_endpoints(self):
+        """Yields `(service, port, host)` of endpoints of all the pairs in order, excluded ones included.
+
+        """
+        for service, hosts, ports in self.iter_pairs():
+            for host in hosts:
+                for port in ports:
+                    yield service, port, host
+
+    def exclude(self, excluded):
+        """Drops all the tasks of endpoints flagged in `excluded` (ordered as `iter_all_endpoints`).
+
+        Flags take a byte per endpoint, indices of the remaining tasks change.
+
+        """
+        if len(excluded) != self.count_pairs_endpoints():
+            raise ValueError('Flags do not match endpoints')
+        self.excluded = excluded
+        self.build()
+
+    def get_endpoints(self):
+        """Returns distinct `(service, port, host)` endpoints having any tasks.
+
+        """
+        endpoints = dict()
+        if self.credentials:
+            for group in range(self.groups_number):
+                service, ports, host = self.get_group(group)
+                for port in ports:
+                    endpoints[(service, port, host)] = None
+        return list(endpoints)
+
+    def get_fingerprint(self):
+        """Returns digest of all the inputs (every item of them), telling apart task spaces.
+
+        Computed once, wordlists are read through again for it.
+
+        """
+        if self.fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            # NOTE: Ports and address ranges are described by their bounds.
+            data = (
+                [(service, ports.ranges) for service, ports in self.services],
+                [(hosts.ranges if isinstance(hosts, Addresses) else len(hosts), ports and ports.ranges) for hosts, ports in self.runs],
+                sorted((service, sorted(options.items())) for service, options in self.options.items() if options),
+            )
+            digest.update(repr(data).encode('utf8', 'surrogateescape'))
+            for sequence in (self.targets, self.usernames, self.secrets, self.combos):
+                digest.update(b'\0')
+                dedup.update_digest(digest, sequence)
+            self.fingerprint = digest.hexdigest()
+        return self.fingerprint
+
+    def count_endpoints(self):
+        """Returns number of endpoints of every service, computed from segment sizes (repeated hosts counted again).
+
+        """
+        counts = {service: 0 for service, _ in self.services}
+        if self.credentials:
+            for service, ports, _, start, stop in self.segments:
+                counts[service] += len(ports) * (stop - start)
+        return counts
+
+    def get_hostnames(self):
+        """Returns targets given by name, to be resolved.
+
+        """
+        return list(dict.fromkeys(host for hosts, _ in self.runs if isinstance(hosts, Hosts) for host in hosts))
+
+    @staticmethod
+    def parse_target(target):
+        try:
+            host, port = target.split(':')
+        except ValueError:
+            host, port = target, None
+        return host, port
+
+    @staticmethod
+    def parse_hosts(host):
+        try:
+            if '/' in host:
+                network = ipaddress.IPv4Network(host, strict=False)
+                return Addresses([range(int(network.network_address), int(network.broadcast_address) + 1)])
+            if '-' in host:
+                first, last = host.split('-', 1)
+                first = ipaddress.IPv4Address(first)
+                # NOTE: Short form replaces the last octet only, e.g. `10.0.0.1-50`.
+                last = ipaddress.IPv4Address(last if '.' in last else (int(first) & ~0xFF) | int(last))
+                return Addresses([range(int(first), int(last) + 1)])
+        except ValueError:
+            pass
+        return [host]
+
+    @staticmethod
+    def parse_ports(ports):
+        result = list()
+        for port in ports.split(','):
+            try:
+                if '-' in port:
+                    first, last = port.split('-', 1)
+                    result.append(range(int(first), int(last) + 1))
+                else:
+                    result.append(range(int(port), int(port) + 1))
+            except ValueError:
+                pass
+        return Ranges(result)
+
+    def __len__(self):
+        return self.total
+
+    def get_segment(self, group):
+        """Returns index of the segment of a group and index of the group within the segment.
+
+        """
+        segment = bisect.bisect_right(self.groups, group) - 1
+        return segment, group - self.groups[segment]
+
+    def get_group(self, group):
+        segment, idx = self.get_segment(group)
+        service, ports, hosts, start, _ = self.segments[segment]
+        return service, ports, hosts[start + idx]
+
+    def get_offset(self, group):
+        """Returns the first task index of a group.
+
+        """
+        segment, idx = self.get_segment(group)
+        _, ports, _, _, _ = self.segments[segment]
+        return self.offsets[segment] + idx * self.credentials * len(ports)
+
+    def locate(self, idx):
+        """Returns `(service, ports, host, idx)` of a task, the index relative to the first task of its group.
+
+        """
+        segment = bisect.bisect_right(self.offsets, idx) - 1
+        service, ports, hosts, start, _ = self.segments[segment]
+        host_idx, idx = divmod(idx - self.offsets[segment], self.credentials * len(ports))
+        return service, ports, hosts[start + host_idx], idx
+
+    def get_key(self, idx):
+        """Returns `(service, port, host)` of a task without decoding its credentials.
+
+        """
+        service, ports, host, idx = self.locate(idx)
+        return service, ports[idx % len(ports)], host
+
+    def get_account(self, idx):
+        """Returns `(service, port, host, username)` of a task without decoding its secret.
+
+        """
+        service, ports, host, idx = self.locate(idx)
+        cred_idx, port_idx = divmod(idx, len(ports))
+        if cred_idx < self.products:
+            username = self.usernames[cred_idx // len(self.secrets)]
+        else:
+            username = self.combos[cred_idx - self.products][0]
+        return service, ports[port_idx], host, username
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.total:
+            raise IndexError(f'Task index {idx} out of range')
+        service, ports, host, idx = self.locate(idx)
+        cred_idx, port_idx = divmod(idx, len(ports))
+        if cred_idx < self.products:
+            username_idx, secret_idx = divmod(cred_idx, len(self.secrets))
+            username, secret = self.usernames[username_idx], self.secrets[secret_idx]
+        else:
+            username, secret = self.combos[cred_idx - self.products]
+        return (service, ports[port_idx], host, username, secret, self.options.get(service, None))
+
+    def __iter__(self):
+        for idx in range(self.total):
+            yield self[idx]
+
+
+class Batches:
+    """Task indices of a `TaskSpace` grouped into batches sharing `(service, port, host, username)`.
+
+    Each batch holds up to `size` consecutive secrets of a single account, combos make batches of one.
+    Without `size` every task is a batch of its own, in the `TaskSpace` order.
+
+    """
+
+    def __init__(self, space, size=None):
+        self.space = space
+        self.size = size
+        if size is None:
+            self.chunks = len(space.secrets)
+            self.total = len(space)
+            return
+        self.chunks = -(-len(space.secrets) // size)
+        # NOTE: `self.offsets` keeps the first batch index of each segment of the task space.
+        self.offsets = array.array('Q')
+        total = 0
+        for _, ports, _, start, stop in space.segments:
+            self.offsets.append(total)
+            total += self.get_group_size(ports) * (stop - start)
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def get_group_size(self, ports):
+        return (len(self.space.usernames) * self.chunks + len(self.space.combos)) * len(ports)
+
+    def get_offset(self, group):
+        """Returns the first batch index of a group.
+
+        """
+        segment, idx = self.space.get_segment(group)
+        _, ports, _, _, _ = self.space.segments[segment]
+        return self.offsets[segment] + idx * self.get_group_size(ports)
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.total:
+            raise IndexError(f'Batch index {idx} out of range')
+        if self.size is None:
+            return [idx]
+        segment = bisect.bisect_right(self.offsets, idx) - 1
+        _, ports, _, _, _ = self.space.segments[segment]
+        group_idx, idx = divmod(idx - self.offsets[segment], self.get_group_size(ports))
+        ports_number = len(ports)
+        secrets_number = len(self.space.secrets)
+        offset = self.space.get_offset(self.space.groups[segment] + group_idx)
+        products = len(self.space.usernames) * self.chunks * ports_number
+        if idx < products:
+            username_idx, idx = divmod(idx, ports_number * self.chunks)
+            port_idx, chunk = divmod(idx, self.chunks)
+            secrets = range(chunk * self.size, min((chunk + 1) * self.size, secrets_number))
+            return [offset + (username_idx * secrets_number + secret_idx) * ports_number + port_idx for secret_idx in secrets]
+        combo_idx, port_idx = divmod(idx - products, ports_number)
+        return [offset + (self.space.products + combo_idx) * ports_number + port_idx]
+
+    def get_index(self, group, ports_number, port_idx, username_idx, chunk):
+        """Returns index of the batch holding `chunk` of secrets of a username, the reverse of `__getitem__`.
+
+        """
+        if self.size is None:
+            return self.space.get_offset(group) + (username_idx * len(self.space.secrets) + chunk) * ports_number + port_idx
+        return self.get_offset(group) + (username_idx * ports_number + port_idx) * self.chunks + chunk
+
+    def get_combo_index(self, group, ports_number, port_idx, combo_idx):
+        if self.size is None:
+            return self.space.get_offset(group) + (self.space.products + combo_idx) * ports_number + port_idx
+        return self.get_offset(group) + (len(self.space.usernames) * self.chunks + combo_idx) * ports_number + port_idx
+
+
+class Order:
+    """Indices of `Batches` in the order of a strategy, each computed on demand.
+
+    Strategies nest usernames, secrets (chunks of them) and endpoints (`(service, port, host)`), outermost first:
+    secret-major (secret, username, endpoint) sprays the most likely secrets first,
+    username-major (username, endpoint, secret) tries accounts one by one,
+    target-interleaved (username, secret, endpoint) spreads consecutive attempts across endpoints.
+    Combos follow all the other credentials, each one tried against every endpoint in turn.
+
+    """
+
+    def __init__(self, batches, strategy):
+        if strategy not in (ORDER_SECRET_MAJOR, ORDER_RANKED, ORDER_USERNAME_MAJOR, ORDER_TARGET_INTERLEAVED):
+            raise ValueError(f'Unknown order strategy `{strategy}`')
+        space = batches.space
+        self.batches = batches
+        self.strategy = strategy
+        # NOTE: `self.endpoints` keeps the first endpoint index of each segment of the task space.
+        self.endpoints = array.array('Q')
+        endpoints_number = 0
+        for _, ports, _, start, stop in space.segments:
+            self.endpoints.append(endpoints_number)
+            endpoints_number += len(ports) * (stop - start)
+        self.endpoints_number = endpoints_number
+        self.usernames_number = len(space.usernames)
+        self.chunks = batches.chunks
+        self.products = self.usernames_number * self.chunks * endpoints_number
+        self.size = len(batches)
+
+    def __len__(self):
+        return self.size
+
+    def get_endpoint(self, endpoint):
+        """Returns `(group, ports_number, port_idx)` of an endpoint.
+
+        """
+        segment = bisect.bisect_right(self.endpoints, endpoint) - 1
+        _, ports, _, _, _ = self.batches.space.segments[segment]
+        group_idx, port_idx = divmod(endpoint - self.endpoints[segment], len(ports))
+        return self.batches.space.groups[segment] + group_idx, len(ports), port_idx
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.size:
+            raise IndexError(f'Order index {idx} out of range')
+        if idx >= self.products:
+            combo_idx, endpoint = divmod(idx - self.products, self.endpoints_number)
+            return self.batches.get_combo_index(*self.get_endpoint(endpoint), combo_idx)
+        if self.strategy in (ORDER_SECRET_MAJOR, ORDER_RANKED):
+            chunk, idx = divmod(idx, self.usernames_number * self.endpoints_number)
+            username_idx, endpoint = divmod(idx, self.endpoints_number)
+        elif self.strategy == ORDER_USERNAME_MAJOR:
+            username_idx, idx = divmod(idx, self.endpoints_number * self.chunks)
+            endpoint, chunk = divmod(idx, self.chunks)
+        else:
+            username_idx, idx = divmod(idx, self.chunks * self.endpoints_number)
+            chunk, endpoint = divmod(idx, self.endpoints_number)
+        return self.batches.get_index(*self.get_endpoint(endpoint), username_idx, chunk)
+
+    def __iter__(self):
+        for idx in range(self.size):
+            yield self[idx]
+
+
+class Permutation:
+    """Keyed pseudo-random bijection over `[0, size)`, every element is computed in O(1).
+
+    Built from a balanced Feistel network over the smallest even-bit domain covering `size`,
+    values falling outside of `[0, size)` are walked through the cipher again (cycle walking).
+
+    """
+
+    def __init__(self, size, seed=None):
+        self.size = size
+        bits = max((size - 1).bit_length(), 2)
+        bits += bits % 2
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        rand = random.Random(seed)
+        self.keys = [rand.getrandbits(64) for _ in range(PERMUTATION_ROUNDS)]
+
+    def __len__(self):
+        return self.size
+
+    def round(self, value, key):
+        value = ((value ^ key) * 0x9E3779B97F4A7C15) & MASK_64
+        value ^= value >> 31
+        return value & self.half_mask
+
+    def encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ self.round(right, key)
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.size:
+            raise IndexError(f'Permutation index {idx} out of range')
+        value = self.encrypt(idx)
+        while value >= self.size:
+            value = self.encrypt(value)
+        return value
+
+    def __iter__(self):
+        for idx in range(self.size):
+            yield self[idx]
@@ -0,0 +1,237 @@
+import array
+import bisect
+import collections.abc
+import itertools
+import mmap
+
+from passtry import exceptions
+
+
+__all__ = ['Chain', 'Combos', 'Ranked', 'Wordlist']
+
+
+ENCODING = 'utf-8'
+FALLBACK_ENCODING = 'latin-1'
+BLOCK_SIZE = 1 << 10
+# NOTE: Multiple of `BLOCK_SIZE`, blocks are counted in chunks to limit reads from the file.
+CHUNK_SIZE = 1 << 20
+
+
+class Wordlist(collections.abc.Sequence):
+    """Lines of a file, memory-mapped and decoded on access.
+
+    The index keeps only the number of lines preceding every `BLOCK_SIZE` bytes of the file,
+    a line is found by splitting the single block it starts in. Lines which can't be decoded
+    with `encoding` are decoded as `latin-1`, so no line is ever lost. Files which can't be
+    memory-mapped (e.g. pipes) are read into memory as bytes.
+
+    """
+
+    def __init__(self, file_obj, encoding=ENCODING):
+        self.name = getattr(file_obj, 'name', None)
+        self.encoding = encoding
+        self.data = self.map(file_obj)
+        self.counts, self.total = self.build_index(self.data)
+        self.cache = (None, None)
+
+    @staticmethod
+    def map(file_obj):
+        try:
+            return mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # NOTE: Empty files, pipes and in-memory files can't be mapped.
+            data = file_obj.read()
+            if isinstance(data, str):
+                data = data.encode(ENCODING)
+            return data
+
+    @staticmethod
+    def build_index(data):
+        """Returns number of line breaks preceding each block and the number of lines.
+
+        """
+        counts = array.array('Q')
+        breaks = 0
+        size = len(data)
+        for chunk_start in range(0, size, CHUNK_SIZE):
+            chunk = data[chunk_start:chunk_start + CHUNK_SIZE]
+            for start in range(0, len(chunk), BLOCK_SIZE):
+                counts.append(breaks)
+                breaks += chunk.count(b'\n', start, start + BLOCK_SIZE)
+        # NOTE: The last line doesn't need to be terminated.
+        return counts, breaks + (size and data[-1:] != b'\n')
+
+    def __len__(self):
+        return self.total
+
+    def get_starts(self, block):
+        """Returns offsets of the lines starting after line breaks in the block.
+
+        """
+        cached_block, starts = self.cache
+        if cached_block != block:
+            offset = block * BLOCK_SIZE
+            parts = self.data[offset:offset + BLOCK_SIZE].split(b'\n')[:-1]
+            starts = list(itertools.accumulate((len(part) + 1 for part in parts), initial=offset))[1:]
+            # NOTE: Replaced at once, safe to share between threads.
+            self.cache = (block, starts)
+        return starts
+
+    def raw(self, idx):
+        if idx:
+            # NOTE: Line `idx` starts right after the line break number `idx - 1`.
+            block = bisect.bisect_right(self.counts, idx - 1) - 1
+            start = self.get_starts(block)[idx - 1 - self.counts[block]]
+        else:
+            start = 0
+        end = self.data.find(b'\n', start)
+        line = self.data[start:len(self.data) if end == -1 else end]
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        return line
+
+    def iter_raw(self):
+        """Yields undecoded lines, reading the file sequentially.
+
+        """
+        rest = b''
+        for start in range(0, len(self.data), CHUNK_SIZE):
+            lines = (rest + self.data[start:start + CHUNK_SIZE]).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                yield line[:-1] if line.endswith(b'\r') else line
+        if rest:
+            yield rest[:-1] if rest.endswith(b'\r') else rest
+
+    def __iter__(self):
+        return map(self.decode, self.iter_raw())
+
+    def decode(self, line):
+        try:
+            return line.decode(self.encoding)
+        except UnicodeDecodeError:
+            return line.decode(FALLBACK_ENCODING)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Line {idx} out of range')
+        return self.decode(self.raw(idx))
+
+    def __contains__(self, value):
+        if not isinstance(value, str):
+            return False
+        needle = value.encode(self.encoding)
+        position = self.data.find(needle)
+        while position != -1:
+            end = position + len(needle)
+            if (position == 0 or self.data[position - 1:position] == b'\n') and self.data[end:end + 1] in (b'', b'\n', b'\r'):
+                return True
+            position = self.data.find(needle, position + 1)
+        return False
+
+    def __getstate__(self):
+        # NOTE: Processes map the file again instead of copying it.
+        state = self.__dict__.copy()
+        if isinstance(self.data, mmap.mmap):
+            state['data'] = None
+        state['cache'] = (None, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.data is None:
+            with open(self.name, 'rb') as fil:
+                self.data = self.map(fil)
+
+
+class Chain(collections.abc.Sequence):
+    """Concatenation of sequences, indexable without copying them.
+
+    """
+
+    def __init__(self, *parts):
+        self.parts = [part for part in parts if len(part)]
+        self.offsets = list(itertools.accumulate((len(part) for part in self.parts), initial=0))
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'Item {idx} out of range')
+        part = bisect.bisect_right(self.offsets, idx) - 1
+        return self.parts[part][idx - self.offsets[part]]
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.parts)
+
+    def __contains__(self, value):
+        return any(value in part for part in self.parts)
+
+
+class Combos(collections.abc.Sequence):
+    """Credentials of a combo `Wordlist`, split on access.
+
+    """
+
+    def __init__(self, wordlist, delimiter=None):
+        self.wordlist = wordlist
+        self.delimiter = delimiter
+        raw_delimiter = None if delimiter is None else delimiter.encode(wordlist.encoding)
+        # NOTE: Validating upfront, raw lines are checked without decoding them.
+        for line in wordlist.iter_raw():
+            if len(line.strip().split(raw_delimiter, 1)) < 2:
+                raise exceptions.DataError(f'Invalid combo file! Line: {wordlist.decode(line)}')
+
+    def __len__(self):
+        return len(self.wordlist)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return tuple(self.wordlist[idx].strip().split(self.delimiter, 1))
+
+    def __iter__(self):
+        for line in self.wordlist:
+            yield tuple(line.strip().split(self.delimiter, 1))
+
+
+class Ranked(collections.abc.Sequence):
+    """Secrets of a `<weight><delimiter><secret>` `Wordlist` (e.g. `uniq -c` output), highest weights first.
+
+    Only line numbers are kept, in the ranked order, secrets are split on access.
+
+    """
+
+    def __init__(self, wordlist, delimiter=None):
+        self.wordlist = wordlist
+        self.delimiter = delimiter
+        raw_delimiter = None if delimiter is None else delimiter.encode(wordlist.encoding)
+        # NOTE: Lines are grouped by weight rather than sorted one by one, equal weights keep the file order.
+        ranks = dict()
+        for idx, line in enumerate(wordlist.iter_raw()):
+            try:
+                weight, _ = line.lstrip().split(raw_delimiter, 1)
+                weight = float(weight)
+            except ValueError:
+                raise exceptions.DataError(f'Invalid ranked secrets file! Line: {wordlist.decode(line)}')
+            ranks.setdefault(weight, array.array('Q')).append(idx)
+        self.order = array.array('Q')
+        for weight in sorted(ranks, reverse=True):
+            self.order.extend(ranks[weight])
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self.wordlist[self.order[idx]].lstrip().split(self.delimiter, 1)[1]
@@ -1,4 +1,3 @@
 from passtry.services.base import *
-from passtry.services.ftp import *
-from passtry.services.http import *
-from passtry.services.ssh import *
+from passtry.services.registry import *
+from passtry.services.resolver import *
@@ -1,11 +1,37 @@
-__all__ = ['Service']
+import socket
+import threading
+
+from passtry import exceptions
+from passtry.services.registry import Registry
+from passtry.services.resolver import RESOLVER
+
+
+__all__ = ['Service', 'close_sessions']
+
+
+class Sessions(threading.local):
+    """Connections kept open by the current thread, at most one per service.
+
+    """
+
+    def __init__(self):
+        self.items = dict()
+
+
+SESSIONS = Sessions()
 
 
 class Service:
 
     port = None
     service = None
-    registry = dict()
+    # NOTE: Built-in services are imported on first lookup, see `Registry`.
+    registry = Registry()
+    # NOTE: Services supporting asyncio natively override it with a coroutine classmethod,
+    #       others are run in an executor by `AsyncJob`.
+    async_execute = None
+    # NOTE: Prefix of the greeting sent by servers right after connecting, checked by `probe`.
+    banner = None
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -15,6 +41,81 @@ class Service:
     def execute(cls, task, timeout):
         raise NotImplementedError
 
+    @classmethod
+    def probe(cls, host, port, timeout):
+        """Returns `True` if the endpoint accepts connections (and greets with `banner` if set).
+
+        """
+        try:
+            address = RESOLVER.resolve(host)
+        except exceptions.ConnectionFailed:
+            return False
+        try:
+            with socket.create_connection((address, port), timeout) as sock:
+                if cls.banner is None:
+                    return True
+                data = b''
+                while len(data) < len(cls.banner):
+                    chunk = sock.recv(len(cls.banner) - len(data))
+                    if not chunk:
+                        break
+                    data += chunk
+                return data == cls.banner
+        except OSError:
+            return False
+
+    @classmethod
+    def setup(cls, endpoints, threads):
+        """Called before attempts start, with the number of endpoints of the service and of threads running them.
+
+        """
+
+    @classmethod
+    def teardown(cls):
+        """Called once attempts are finished, releases resources allocated by `setup`.
+
+        """
+
+    @classmethod
+    def session_execute(cls, task, timeout):
+        """Same as `execute`, but reusing connection kept by the current thread if supported.
+
+        """
+        return cls.execute(task, timeout)
+
+    @classmethod
+    def get_session(cls, key):
+        try:
+            session_key, session = SESSIONS.items[cls.service]
+        except KeyError:
+            return None
+        if session_key == key:
+            return session
+        cls.close_session()
+        return None
+
+    @classmethod
+    def set_session(cls, key, session):
+        SESSIONS.items[cls.service] = (key, session)
+
+    @classmethod
+    def close_session(cls):
+        try:
+            _, session = SESSIONS.items.pop(cls.service)
+        except KeyError:
+            pass
+        else:
+            cls.disconnect(session)
+
+    @classmethod
+    def disconnect(cls, session):
+        pass
+
     @classmethod
     def prettify(cls, task):
         return '{services}://{usernames}:{secrets}@{targets}:{ports}'.format(**task)
+
+
+def close_sessions():
+    for service in list(SESSIONS.items):
+        Service.registry[service].close_session()
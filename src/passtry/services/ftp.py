@@ -1,3 +1,4 @@
+import asyncio
 import ftplib
 import socket
 
@@ -15,6 +16,7 @@ class Ftp(services.Service):
 
     port = 21
     service = 'ftp'
+    banner = b'220'
 
     @classmethod
     def map_kwargs(cls, task):
@@ -26,13 +28,27 @@ class Ftp(services.Service):
         }
 
     @classmethod
-    def execute(cls, task, timeout):
-        kwargs = cls.map_kwargs(task)
+    def connect(cls, kwargs, timeout):
+        address = services.RESOLVER.resolve(kwargs['host'])
         ftp = ftplib.FTP(timeout=timeout)
         try:
-            ftp.connect(kwargs['host'], kwargs['port'])
+            ftp.connect(address, kwargs['port'])
         except (TimeoutError, ConnectionRefusedError, EOFError):
             raise exceptions.ConnectionFailed
+        return ftp
+
+    @classmethod
+    def disconnect(cls, ftp):
+        try:
+            ftp.quit()
+        except (OSError, EOFError, ftplib.Error):
+            pass
+        ftp.close()
+
+    @classmethod
+    def execute(cls, task, timeout):
+        kwargs = cls.map_kwargs(task)
+        ftp = cls.connect(kwargs, timeout)
         result = False
         try:
             ftp.login(kwargs['user'], kwargs['passwd'])
@@ -43,9 +59,80 @@ class Ftp(services.Service):
             raise exceptions.ConnectionFailed
         else:
             result = True
+        finally:
+            cls.disconnect(ftp)
+        return result
+
+    @classmethod
+    def session_execute(cls, task, timeout):
+        kwargs = cls.map_kwargs(task)
+        key = (kwargs['host'], kwargs['port'])
+        ftp = cls.get_session(key)
+        for _ in range(2):
+            if ftp is None:
+                ftp = cls.connect(kwargs, timeout)
+                cls.set_session(key, ftp)
+            try:
+                ftp.login(kwargs['user'], kwargs['passwd'])
+            except ftplib.error_perm:
+                return False
+            # NOTE: Connection dropped or rate limited (e.g. `421`), the attempt is repeated once
+            #       using a new connection.
+            except (ftplib.error_temp, TimeoutError, EOFError, OSError, socket.timeout):
+                cls.close_session()
+                ftp = None
+            else:
+                # NOTE: Logged in session can't be used for another attempt.
+                cls.close_session()
+                return True
+        raise exceptions.ConnectionFailed
+
+    @classmethod
+    async def async_response(cls, reader, timeout):
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        if not line:
+            raise EOFError
+        # NOTE: Multiline replies start with `xyz-` and end with a `xyz ` line.
+        if line[3:4] == b'-':
+            code = line[:3]
+            while not (line[:3] == code and line[3:4] != b'-'):
+                line = await asyncio.wait_for(reader.readline(), timeout)
+                if not line:
+                    raise EOFError
+        return line.decode('utf8', errors='replace')
+
+    @classmethod
+    async def async_command(cls, reader, writer, command, timeout):
+        writer.write(command.encode('utf8') + b'\r\n')
+        await writer.drain()
+        return await cls.async_response(reader, timeout)
+
+    @classmethod
+    async def async_execute(cls, task, timeout):
+        kwargs = cls.map_kwargs(task)
+        address = services.RESOLVER.resolve(kwargs['host'])
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(address, kwargs['port']), timeout)
+        except (OSError, asyncio.TimeoutError):
+            raise exceptions.ConnectionFailed
+        try:
+            response = await cls.async_response(reader, timeout)
+            if not response.startswith('2'):
+                raise exceptions.ConnectionFailed
+            response = await cls.async_command(reader, writer, 'USER ' + kwargs['user'], timeout)
+            if response.startswith('3'):
+                response = await cls.async_command(reader, writer, 'PASS ' + kwargs['passwd'], timeout)
+            # NOTE: Temporary errors (e.g. `421 Too many connections`) are treated as failed connections.
+            if response.startswith('4'):
+                raise exceptions.ConnectionFailed
+            result = response.startswith('2')
+        except (OSError, EOFError, asyncio.TimeoutError):
+            raise exceptions.ConnectionFailed
         finally:
             try:
-                ftp.quit()
-            except (OSError, EOFError):
+                writer.write(b'QUIT\r\n')
+                writer.close()
+                await asyncio.wait_for(writer.wait_closed(), timeout)
+            except (OSError, asyncio.TimeoutError):
                 pass
         return result
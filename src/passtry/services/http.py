@@ -1,6 +1,7 @@
 from urllib import parse
 
 import requests
+import urllib3
 
 from passtry import (
     exceptions,
@@ -12,6 +13,55 @@ from passtry import (
 __all__ = ['HttpBasicAuth', 'HttpsBasicAuth']
 
 
+DRAIN_LIMIT = 65536
+POOLS_LIMIT = 1000
+# NOTE: Adapters set up by a job per service, shared by all of its threads.
+ADAPTERS = dict()
+
+
+# NOTE: Disable `Unverified HTTPS request is being made` warning, certificates are not verified on purpose.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class ResolvedConnectionMixin:
+    """Connects to the address cached by `RESOLVER`, the hostname is kept for the `Host` header and TLS.
+
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        self._dns_host = services.RESOLVER.resolve(host)
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class HTTPConnection(ResolvedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class HTTPSConnection(ResolvedConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class HTTPConnectionPool(urllib3.HTTPConnectionPool):
+
+    ConnectionCls = HTTPConnection
+
+
+class HTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+
+    ConnectionCls = HTTPSConnection
+
+
+class HTTPAdapter(requests.adapters.HTTPAdapter):
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': HTTPConnectionPool, 'https': HTTPSConnectionPool}
+
+
 class HttpMixin:
 
     @classmethod
@@ -26,8 +76,45 @@ class HttpMixin:
         mapping['path'] = options.get('path', '') if options else ''
         mapping['query'] = options.get('query', '') if options else ''
         mapping['fragment'] = options.get('fragment', '') if options else ''
+        mapping['method'] = options.get('method', 'GET').upper() if options else 'GET'
         return mapping
 
+    @classmethod
+    def setup(cls, endpoints, threads):
+        # NOTE: A pool per endpoint, so that none is evicted by threads going through the other ones,
+        #       each keeping up to a connection per thread.
+        cls.teardown()
+        ADAPTERS[cls.service] = HTTPAdapter(pool_connections=min(endpoints, POOLS_LIMIT), pool_maxsize=threads)
+
+    @classmethod
+    def teardown(cls):
+        adapter = ADAPTERS.pop(cls.service, None)
+        if adapter is not None:
+            adapter.close()
+
+    @classmethod
+    def get_requests_session(cls):
+        """Returns `requests.Session` of the current thread, keeping connections alive between attempts.
+
+        """
+        session = cls.get_session(None)
+        if session is None:
+            session = requests.Session()
+            adapter = ADAPTERS.get(cls.service)
+            if adapter is None:
+                # NOTE: Not set up by a job (e.g. `execute` called directly), connections are kept by the session.
+                adapter = HTTPAdapter(pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            cls.set_session(None, session)
+        return session
+
+    @classmethod
+    def disconnect(cls, session):
+        # NOTE: Connections of the shared adapter are closed by `teardown`.
+        if session.adapters['http://'] is not ADAPTERS.get(cls.service):
+            session.close()
+
 
 class HttpBasicAuth(HttpMixin, services.Service):
 
@@ -38,11 +125,30 @@ class HttpBasicAuth(HttpMixin, services.Service):
     @classmethod
     def execute(cls, task, timeout):
         kwargs = cls.map_kwargs(task)
-        url = parse.urlunsplit((cls.scheme, kwargs['netloc'], kwargs['path'], kwargs['query'], kwargs['fragment']))
+        netloc = f"{kwargs['netloc']}:{kwargs['port']}"
+        url = parse.urlunsplit((cls.scheme, netloc, kwargs['path'], kwargs['query'], kwargs['fragment']))
+        session = cls.get_requests_session()
         try:
-            response = requests.get(url, auth=requests.auth.HTTPBasicAuth(kwargs['user'], kwargs['pass']), verify=False, allow_redirects=False, timeout=timeout)
-        except requests.exceptions.Timeout:
+            response = session.request(
+                kwargs['method'],
+                url,
+                auth=requests.auth.HTTPBasicAuth(kwargs['user'], kwargs['pass']),
+                verify=False,
+                allow_redirects=False,
+                timeout=timeout,
+                stream=True,
+            )
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
             raise exceptions.ConnectionFailed
+        # NOTE: Result depends on the status line only. Small bodies are drained for the connection
+        #       to return to the pool, larger ones are dropped along with the connection.
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) <= DRAIN_LIMIT:
+            try:
+                response.content
+            except requests.exceptions.RequestException:
+                pass
+        response.close()
         if response.status_code == 200:
             return True
         else:
@@ -50,7 +156,7 @@ class HttpBasicAuth(HttpMixin, services.Service):
 
     @classmethod
     def prettify(cls, task):
-        path = task['options'].get('path', None)
+        path = (task['options'] or dict()).get('path', None)
         task['services'] = cls.scheme
         result = '{services}://{usernames}:{secrets}@{targets}:{ports}'.format(**task)
         if path:
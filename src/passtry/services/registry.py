@@ -0,0 +1,41 @@
+import importlib
+
+
+__all__ = ['MODULES', 'Registry']
+
+
+# NOTE: Built-in services as `name: (module, default port)`, modules are imported on first lookup of a service.
+MODULES = {
+    'ftp': ('passtry.services.ftp', 21),
+    'http-basic': ('passtry.services.http', 80),
+    'https-basic': ('passtry.services.http', 443),
+    'ssh': ('passtry.services.ssh', 22),
+}
+
+
+class Registry(dict):
+    """Service classes by name, built-in ones are imported (along with their dependencies) when looked up.
+
+    """
+
+    def __missing__(self, service):
+        module, _ = MODULES[service]
+        # NOTE: Importing the module registers its classes, see `Service.__init_subclass__`.
+        importlib.import_module(module)
+        return dict.__getitem__(self, service)
+
+    def names(self):
+        """Returns names of all the services, without importing any.
+
+        """
+        return sorted(set(MODULES) | set(self))
+
+    def get_port(self, service):
+        """Returns default port of a service, without importing it if built-in.
+
+        """
+        try:
+            _, port = MODULES[service]
+        except KeyError:
+            return self[service].port
+        return port
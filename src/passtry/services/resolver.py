@@ -0,0 +1,72 @@
+import concurrent.futures
+import socket
+import time
+
+from passtry import exceptions
+
+
+__all__ = ['RESOLVER', 'Resolver']
+
+
+TTL = 300
+RESOLVE_THREADS = 50
+
+
+class Resolver:
+    """Address of every hostname resolved at most once per `ttl` seconds, shared by all the threads and services.
+
+    Names failing to resolve are cached as well, attempts on them fail without querying the resolver again.
+
+    """
+
+    def __init__(self, ttl=TTL):
+        self.ttl = ttl
+        self.addresses = dict()
+
+    @staticmethod
+    def lookup(host):
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (OSError, UnicodeError):
+            return None
+        # NOTE: Only a single address is kept, IPv4 is preferred as more likely to be served on.
+        for family, _, _, _, address in infos:
+            if family == socket.AF_INET:
+                return address[0]
+        return infos[0][4][0]
+
+    def resolve(self, host):
+        """Returns address of `host`, raises `ConnectionFailed` if it doesn't resolve.
+
+        """
+        # NOTE: No locking, threads missing the cache at once resolve the same name, the last one is kept.
+        now = time.monotonic()
+        try:
+            address, expires = self.addresses[host]
+        except KeyError:
+            address, expires = None, now
+        if now >= expires:
+            address = self.lookup(host)
+            # NOTE: Literal addresses (e.g. of address ranges) resolve to themselves, they are not kept.
+            if address != host:
+                self.addresses[host] = (address, now + self.ttl)
+        if address is None:
+            raise exceptions.ConnectionFailed
+        return address
+
+    def prefetch(self, hosts):
+        """Resolves `hosts` in parallel, returns the ones failing to resolve.
+
+        """
+        hosts = list(hosts)
+        if not hosts:
+            return list()
+        now = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(RESOLVE_THREADS, len(hosts))) as executor:
+            addresses = list(executor.map(self.lookup, hosts))
+        for host, address in zip(hosts, addresses):
+            self.addresses[host] = (address, now + self.ttl)
+        return [host for host, address in zip(hosts, addresses) if address is None]
+
+
+RESOLVER = Resolver()
@@ -16,6 +16,7 @@ class Ssh(services.Service):
 
     port = 22
     service = 'ssh'
+    banner = b'SSH-'
 
     @classmethod
     def map_kwargs(cls, task):
@@ -27,23 +28,59 @@ class Ssh(services.Service):
         }
 
     @classmethod
-    def execute(cls, task, timeout):
-        kwargs = cls.map_kwargs(task)
-        result = False
+    def connect(cls, kwargs, timeout):
         try:
-            transport = paramiko.Transport((kwargs['hostname'], kwargs['port']))
+            transport = paramiko.Transport((services.RESOLVER.resolve(kwargs['hostname']), kwargs['port']))
             transport.start_client(timeout=timeout)
         except (paramiko.ssh_exception.SSHException, socket.gaierror, EOFError):
             raise exceptions.ConnectionFailed
-        else:
-            try:
-                transport.auth_password(kwargs['username'], kwargs['password'])
-            except (paramiko.ssh_exception.AuthenticationException, paramiko.ssh_exception.SSHException):
-                pass
-            else:
-                result = True
+        return transport
+
+    @classmethod
+    def disconnect(cls, transport):
         try:
             transport.close()
         except paramiko.ssh_exception.SSHException:
             pass
+
+    @classmethod
+    def execute(cls, task, timeout):
+        kwargs = cls.map_kwargs(task)
+        result = False
+        transport = cls.connect(kwargs, timeout)
+        try:
+            transport.auth_password(kwargs['username'], kwargs['password'])
+        except (paramiko.ssh_exception.AuthenticationException, paramiko.ssh_exception.SSHException):
+            pass
+        else:
+            result = True
+        cls.disconnect(transport)
         return result
+
+    @classmethod
+    def session_execute(cls, task, timeout):
+        kwargs = cls.map_kwargs(task)
+        key = (kwargs['hostname'], kwargs['port'], kwargs['username'])
+        transport = cls.get_session(key)
+        if transport is not None and not transport.is_active():
+            cls.close_session()
+            transport = None
+        # NOTE: Servers drop the connection after a number of failed attempts (`MaxAuthTries`),
+        #       an attempt interrupted this way is repeated once using a new connection.
+        for _ in range(2):
+            if transport is None:
+                transport = cls.connect(kwargs, timeout)
+                cls.set_session(key, transport)
+            try:
+                transport.auth_password(kwargs['username'], kwargs['password'])
+            except (paramiko.ssh_exception.SSHException, EOFError, OSError):
+                # NOTE: `AuthenticationException` is also raised when the connection gets closed.
+                if transport.is_active():
+                    return False
+                cls.close_session()
+                transport = None
+            else:
+                # NOTE: Authenticated transport can't be used for another attempt.
+                cls.close_session()
+                return True
+        raise exceptions.ConnectionFailed
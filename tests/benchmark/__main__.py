@@ -0,0 +1,11 @@
+import pathlib
+import sys
+
+# NOTE: Running as `python tests/benchmark`, the package is imported from its parent directory.
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+from benchmark import runner  # noqa: E402
+
+
+if __name__ == '__main__':
+    runner.main()
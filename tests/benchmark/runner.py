@@ -0,0 +1,185 @@
+"""Measures `Job` throughput against local stand-in servers.
+
+Usage: `python tests/benchmark --services ssh,ftp --threads 1,10 --sizes 100,1000 --output results.json`
+
+Cold start (a fresh interpreter running the command line tool) is measured as well, see `--cold-start-runs`.
+
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import passtry
+from passtry import jobs
+
+from benchmark import servers
+
+
+THREADS = '1,10,50'
+SIZES = '100,1000'
+SERVICES = ','.join(servers.SERVERS)
+COLD_START_RUNS = 5
+
+
+class RecordingMetrics(jobs.metrics.Metrics):
+    """Keeps every attempt duration and the time the first attempt started.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.durations = list()
+        self.first_started = None
+
+    def start(self, task):
+        if self.first_started is None:
+            self.first_started = time.monotonic()
+        super().start(task)
+
+    def record(self, task, duration, outcome):
+        super().record(task, duration, outcome)
+        self.durations.append(duration)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_case(service, target, threads, size, reuse_connections=False):
+    """Runs a single job in the current process, `size` secrets with the valid one last.
+
+    """
+    started = time.monotonic()
+    job = jobs.Job(
+        threads_number=threads,
+        time_wait=0,
+        watch_failures=False,
+        reuse_connections=reuse_connections,
+    )
+    job.metrics = RecordingMetrics()
+    secrets = [f'Secret{idx}' for idx in range(size - 1)] + [servers.SECRET]
+    job.prepare([service], [target], [servers.USERNAME], secrets)
+    running = time.monotonic()
+    job.run()
+    finished = time.monotonic()
+    job.finish()
+    durations = job.metrics.durations
+    return {
+        'service': service,
+        'threads': threads,
+        'size': size,
+        'reuse_connections': reuse_connections,
+        'attempts': job.attempts.get(),
+        'failed': job.failed.get(),
+        'results': len(job.results.get()),
+        'duration': finished - running,
+        'attempts_per_second': job.attempts.get() / (finished - running),
+        'latency_p50': percentile(durations, 0.5),
+        'latency_p99': percentile(durations, 0.99),
+        'startup': (job.metrics.first_started or finished) - started,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_command(args):
+    """Runs the command line tool in a fresh interpreter, returns its wall time.
+
+    """
+    env = dict(os.environ)
+    # NOTE: The same `passtry` package as the one benchmarked in-process.
+    path = str(pathlib.Path(passtry.__file__).parent.parent)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [path, env.get('PYTHONPATH')]))
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', 'import passtry; passtry.main()'] + args, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.monotonic() - started
+
+
+def run_cold_start(runs=COLD_START_RUNS):
+    """Measures `--list-services` and a single attempt FTP job, both including interpreter startup.
+
+    """
+    results = list()
+    with servers.FTPServer() as server:
+        cases = {
+            'list_services': ['--list-services'],
+            'ftp_job': ['-s', f'ftp:{server.port}', '-t', server.host, '-U', servers.USERNAME, '-S', servers.SECRET, '-q'],
+        }
+        for case, args in cases.items():
+            durations = [run_command(args) for _ in range(runs)]
+            results.append({'case': case, 'runs': runs, 'median': statistics.median(durations), 'min': min(durations)})
+            print(f'{case:>14} cold start  median={statistics.median(durations) * 1000:.0f}ms  min={min(durations) * 1000:.0f}ms')
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=pathlib.Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(services, threads, sizes, reuse_connections=False):
+    """Runs every combination, each job in a fresh process so peak RSS and startup are its own.
+
+    """
+    results = list()
+    context = multiprocessing.get_context('spawn')
+    for service in services:
+        with servers.SERVERS[service]() as server:
+            for threads_number in threads:
+                for size in sizes:
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        result = executor.submit(run_case, service, server.target, threads_number, size, reuse_connections).result()
+                    result['connections'] = server.connections
+                    server.connections = 0
+                    results.append(result)
+                    print(
+                        f'{service:>10} threads={threads_number:<4} size={size:<6} '
+                        f'{result["attempts_per_second"]:9.1f} attempts/s  '
+                        f'p50={result["latency_p50"] * 1000:7.1f}ms  p99={result["latency_p99"] * 1000:7.1f}ms  '
+                        f'rss={result["peak_rss_kb"] // 1024}MB  startup={result["startup"] * 1000:.0f}ms'
+                    )
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='passtry benchmark')
+    parser.add_argument('--services', default=SERVICES, help=f'Services (`,` separated, available: {SERVICES})')
+    parser.add_argument('--threads', default=THREADS, help='Numbers of threads (`,` separated)')
+    parser.add_argument('--sizes', default=SIZES, help='Numbers of tasks (`,` separated)')
+    parser.add_argument('--reuse-connections', default=False, action='store_true', help='Reuse connections')
+    parser.add_argument('--cold-start-runs', type=int, default=COLD_START_RUNS, help='Runs of each cold start case (`0` skips them)')
+    parser.add_argument('--output', default=None, help='Save results to a JSON file')
+    parsed = parser.parse_args(args)
+    cold_start = run_cold_start(parsed.cold_start_runs) if parsed.cold_start_runs else list()
+    results = run(
+        parsed.services.split(','),
+        [int(value) for value in parsed.threads.split(',')],
+        [int(value) for value in parsed.sizes.split(',')],
+        parsed.reuse_connections,
+    )
+    if parsed.output:
+        with open(parsed.output, 'w') as fil:
+            json.dump({
+                'commit': get_commit(),
+                'date': datetime.datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+                'cold_start': cold_start,
+            }, fil, indent=2)
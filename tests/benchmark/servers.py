@@ -0,0 +1,203 @@
+import base64
+import http.server
+import socket
+import socketserver
+import threading
+
+import paramiko
+
+
+USERNAME = 'user'
+SECRET = 'P@55w0rd!'
+
+
+class Server:
+    """Stand-in server listening on a random local port, accepting only `USERNAME:SECRET`.
+
+    """
+
+    service = None
+
+    def __init__(self):
+        self.host = '127.0.0.1'
+        self.port = None
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def count_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    @property
+    def target(self):
+        return f'{self.host}:{self.port}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class SSHInterface(paramiko.ServerInterface):
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (USERNAME, SECRET):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+
+class SSHServer(Server):
+
+    service = 'ssh'
+    key = None
+
+    def __init__(self):
+        super().__init__()
+        self.sock = None
+        self.transports = list()
+        if SSHServer.key is None:
+            SSHServer.key = paramiko.RSAKey.generate(2048)
+
+    def handle(self, conn):
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(self.key)
+        with self.lock:
+            self.transports.append(transport)
+        try:
+            transport.start_server(server=SSHInterface())
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+
+    def accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            self.count_connection()
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, 0))
+        self.sock.listen(128)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def stop(self):
+        self.sock.close()
+        with self.lock:
+            for transport in self.transports:
+                transport.close()
+
+
+class FTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.owner.count_connection()
+        self.reply('220 Ready')
+        username = None
+        for line in self.rfile:
+            command, _, argument = line.decode('latin-1').strip().partition(' ')
+            command = command.upper()
+            if command == 'USER':
+                username = argument
+                self.reply('331 Password required')
+            elif command == 'PASS':
+                if (username, argument) == (USERNAME, SECRET):
+                    self.reply('230 Logged in')
+                else:
+                    self.reply('530 Login incorrect')
+            elif command == 'QUIT':
+                self.reply('221 Goodbye')
+                break
+            else:
+                self.reply('502 Command not implemented')
+
+
+class TCPServer(socketserver.ThreadingTCPServer):
+
+    allow_reuse_address = True
+    daemon_threads = True
+    # NOTE: Default backlog of 5 drops connections of concurrent workers, adding retransmission delays.
+    request_queue_size = 128
+
+
+class ThreadingHTTPServer(http.server.ThreadingHTTPServer):
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FTPServer(Server):
+
+    service = 'ftp'
+
+    def start(self):
+        self.server = TCPServer((self.host, 0), FTPHandler)
+        self.server.owner = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HTTPHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # NOTE: Buffering the response, so headers and body go out in a single packet.
+    wbufsize = 1 << 16
+    authorization = 'Basic ' + base64.b64encode(f'{USERNAME}:{SECRET}'.encode()).decode()
+
+    def setup(self):
+        super().setup()
+        self.server.owner.count_connection()
+
+    def reply(self, body):
+        authorized = self.headers.get('Authorization') == self.authorization
+        content = b'OK' if authorized else b'Unauthorized'
+        self.send_response(200 if authorized else 401)
+        if not authorized:
+            self.send_header('WWW-Authenticate', 'Basic realm="passtry"')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def do_GET(self):
+        self.reply(True)
+
+    def do_HEAD(self):
+        self.reply(False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPServer(Server):
+
+    service = 'http-basic'
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, 0), HTTPHandler)
+        self.server.owner = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+SERVERS = {server.service: server for server in (SSHServer, FTPServer, HTTPServer)}
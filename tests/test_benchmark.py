@@ -0,0 +1,20 @@
+import pytest
+
+from benchmark import (
+    runner,
+    servers,
+)
+
+
+@pytest.mark.parametrize('service', list(servers.SERVERS))
+def test_benchmark_case(service):
+    with servers.SERVERS[service]() as server:
+        result = runner.run_case(service, server.target, 2, 10)
+    assert result['attempts'] == 10
+    assert result['results'] == 1
+    assert result['latency_p50'] <= result['latency_p99']
+
+
+def test_cold_start():
+    results = runner.run_cold_start(1)
+    assert [result['case'] for result in results] == ['list_services', 'ftp_job']
@@ -1,3 +1,4 @@
+import json
 import shlex
 
 import pytest
@@ -164,3 +165,36 @@ def test_saving_output(ssh_service, data_dir, tmp_dir):
         assert 'user:P@55w0rd!' in output
         assert 'user2:P@55w0rd!' in output
         assert 'user3:PassPass' in output
+
+
+def test_saving_output_jsonl(ssh_service, tmp_dir):
+    ssh_host, ssh_port = ssh_service
+    args = shlex.split(f'-tN 1 -s ssh -U user,user2 -S "Password,P@55w0rd!" -t {ssh_host} -Of {tmp_dir}/output.jsonl -OF jsonl')
+    parser = passtry.get_parser()
+    passtry.parse_args(parser, args)
+    with open(tmp_dir + '/output.jsonl') as fil:
+        output = [json.loads(line) for line in fil]
+    assert {(line['username'], line['secret'], line['uri']) for line in output} == {
+        ('user', 'P@55w0rd!', f'ssh://user:P@55w0rd!@{ssh_host}:{ssh_port}'),
+        ('user2', 'P@55w0rd!', f'ssh://user2:P@55w0rd!@{ssh_host}:{ssh_port}'),
+    }
+
+
+def test_async(ssh_service):
+    ssh_host, ssh_port = ssh_service
+    args = shlex.split(f'-eA -cN 10 -s ssh -U user,user2 -S "Password,P@55w0rd!" -t {ssh_host}')
+    parser = passtry.get_parser()
+    assert set(passtry.parse_args(parser, args)) == {
+        f'ssh://user:P@55w0rd!@{ssh_host}:{ssh_port}',
+        f'ssh://user2:P@55w0rd!@{ssh_host}:{ssh_port}',
+    }
+
+
+def test_processes(ssh_service):
+    ssh_host, ssh_port = ssh_service
+    args = shlex.split(f'-pN 2 -s ssh -U user,user2 -S "Password,P@55w0rd!" -t {ssh_host}')
+    parser = passtry.get_parser()
+    assert set(passtry.parse_args(parser, args)) == {
+        f'ssh://user:P@55w0rd!@{ssh_host}:{ssh_port}',
+        f'ssh://user2:P@55w0rd!@{ssh_host}:{ssh_port}',
+    }
@@ -1,6 +1,13 @@
+import http.server
+import threading
+
 import pytest
 
-from passtry import jobs
+from passtry import (
+    exceptions,
+    jobs,
+    services,
+)
 
 
 def test_ssh(ssh_service):
@@ -37,3 +44,135 @@ def test_https_basic(https_service):
         [f'https-basic:{service_port}'], [service_host], ['user'], ['P@55w0rd!', 'Password'], {'https-basic': {'path': '/http-basic/'}}
     )
     assert job.output == [f'https://user:P@55w0rd!@{service_host}:{service_port}/http-basic/']
+
+
+def test_ftp_async(ftp_service):
+    service_host, service_port = ftp_service
+    job = jobs.AsyncJob(watch_failures=False)
+    job.start(
+        [f'ftp:{service_port}'], [service_host], ['user'], ['P@55w0rd!', 'Password']
+    )
+    assert job.output == [f'ftp://user:P@55w0rd!@{service_host}:{service_port}']
+
+
+def test_ssh_async(ssh_service):
+    service_host, service_port = ssh_service
+    job = jobs.AsyncJob(watch_failures=False)
+    job.start(
+        [f'ssh:{service_port}'], [service_host], ['user'], ['P@55w0rd!', 'Password']
+    )
+    assert job.output == [f'ssh://user:P@55w0rd!@{service_host}:{service_port}']
+
+
+def test_ssh_reuse_connections(ssh_service):
+    service_host, service_port = ssh_service
+    job = jobs.Job(watch_failures=False, reuse_connections=True)
+    job.start(
+        [f'ssh:{service_port}'], [service_host], ['user'], ['Password', 'Password!', 'P@55w0rd!', 'password', 'passw0rd', 'PASSWORD', 'Passw0rd!']
+    )
+    assert job.output == [f'ssh://user:P@55w0rd!@{service_host}:{service_port}']
+
+
+def test_http_basic_head(http_service):
+    service_host, service_port = http_service
+    job = jobs.Job(watch_failures=False)
+    job.start(
+        [f'http-basic:{service_port}'], [service_host], ['user'], ['P@55w0rd!', 'Password'], {'http-basic': {'path': '/http-basic/', 'method': 'head'}}
+    )
+    assert job.output == [f'http://user:P@55w0rd!@{service_host}:{service_port}/http-basic/']
+
+
+def test_ftp_reuse_connections(ftp_service):
+    service_host, service_port = ftp_service
+    job = jobs.Job(watch_failures=False, reuse_connections=True)
+    job.start(
+        [f'ftp:{service_port}'], [service_host], ['user'], ['Password', 'Password!', 'P@55w0rd!', 'password', 'passw0rd', 'PASSWORD', 'Passw0rd!']
+    )
+    assert job.output == [f'ftp://user:P@55w0rd!@{service_host}:{service_port}']
+
+
+def test_ssh_session_dropped(monkeypatch):
+    ssh = services.Service.registry['ssh']
+    connects = list()
+
+    class Transport:
+        # NOTE: Server closing the connection on every authentication attempt.
+        active = True
+
+        def is_active(self):
+            return self.active
+
+        def auth_password(self, username, password):
+            self.active = False
+            raise EOFError
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(ssh, 'connect', lambda kwargs, timeout: connects.append(kwargs) or Transport())
+    with pytest.raises(exceptions.ConnectionFailed):
+        ssh.session_execute(('ssh', 22, 'example.com', 'user', 'Password'), 1)
+    assert len(connects) == 2
+    assert ssh.get_session(('example.com', 22, 'user')) is None
+
+
+def test_http_keep_alive():
+    connections = list()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            connections.append(self.server.server_port)
+
+        def do_GET(self):
+            self.send_response(401)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    servers = [http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler) for _ in range(12)]
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports = ','.join(str(server.server_port) for server in servers)
+    job = jobs.Job(threads_number=1, time_wait=0, watch_failures=False)
+    try:
+        job.start(
+            [f'http-basic:{ports}'], ['127.0.0.1'], ['user'], ['Password', 'Password!', 'P@55w0rd!'], {'http-basic': {'path': '/', 'method': 'get'}}
+        )
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    assert job.attempts.get() == 36
+    # NOTE: A single connection to every endpoint, none evicted from the pools.
+    assert sorted(connections) == sorted(server.server_port for server in servers)
+
+
+def test_resolver(monkeypatch):
+    resolver = services.Resolver(ttl=60)
+    lookups = list()
+    lookup = resolver.lookup
+    monkeypatch.setattr(resolver, 'lookup', lambda host: lookups.append(host) or lookup(host))
+    assert resolver.prefetch(['localhost', 'localhost.invalid']) == ['localhost.invalid']
+    assert resolver.resolve('localhost') in ('127.0.0.1', '::1')
+    with pytest.raises(exceptions.ConnectionFailed):
+        resolver.resolve('localhost.invalid')
+    assert lookups == ['localhost', 'localhost.invalid']
+    resolver.ttl = 0
+    resolver.resolve('127.0.0.1')
+    resolver.resolve('127.0.0.1')
+    assert lookups[2:] == ['127.0.0.1', '127.0.0.1']
+
+
+def test_registry():
+    registry = services.registry.Registry()
+    assert registry.names() == sorted(services.MODULES)
+    for name in services.MODULES:
+        assert registry.get_port(name) == services.Service.registry[name].port
+    with pytest.raises(KeyError):
+        services.Service.registry['unknown']